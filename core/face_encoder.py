@@ -4,6 +4,8 @@ import sys
 import numpy as np
 import json
 import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -13,10 +15,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Encoder")
 
 from shared.config import (
-    YUNET_PATH, MOBILEFACENET_PATH, 
-    EMBEDDINGS_FILE, NAMES_FILE, KNOWN_FACES_DIR,
-    DETECTION_THRESHOLD
+    EMBEDDINGS_FILE, NAMES_FILE, EMBEDDINGS_META_FILE, KNOWN_FACES_DIR,
+    DETECTION_THRESHOLD, model_paths
 )
+# Same model files / DNN target as the live recognizer, so the gallery matches it
+from core.recognizer import dnn_backend_target, embedding_precision, stored_embedding_precision
 
 # [NEW] Import Aligner
 try:
@@ -26,21 +29,35 @@ except ImportError:
     logger.warning("Could not import StandardFaceAligner. Using fallback cropping.")
     aligner = None
 
+# Max faces per MobileFaceNet forward pass (bounds the blob to ~5 MB)
+EMBED_BATCH_SIZE = 32
+# cv2.imread releases the GIL, so a few threads overlap decode with file I/O
+READ_WORKERS = 4
+# Full re-scans at least this big detect + align in worker processes (parallel=True only);
+# below it the per-worker startup (import cv2, load YuNet) costs more than it saves
+PARALLEL_MIN_IMAGES = 100
+
 class FaceEncoder:
-    def __init__(self):
-        self.yunet_path = YUNET_PATH
-        self.mobilefacenet_path = MOBILEFACENET_PATH
+    def __init__(self, load_data=True, parallel=False):
+        self.yunet_path, self.mobilefacenet_path = model_paths()
         self.embeddings_file = EMBEDDINGS_FILE
         self.names_file = NAMES_FILE
+        self.meta_file = EMBEDDINGS_META_FILE
         self.known_faces_dir = KNOWN_FACES_DIR
         
         self.detector = None
         self.recognizer = None
         self.known_embeddings = []
         self.known_names = []
+        self._input_size = None # Last size passed to detector.setInputSize
+        self.stop_event = None # Optional threading.Event: once set, stop after the current image / batch
+        # Worker processes for big scans. CLI only: spawned workers re-import __main__, which
+        # inside the HMI means PyQt5, picamera2 and all of hmi.py per worker, next to the camera
+        self.parallel = parallel
         
         self._load_models()
-        self._load_existing_data()
+        if load_data:
+            self._load_existing_data()
 
     def _load_models(self):
         if not os.path.exists(self.yunet_path) or not os.path.exists(self.mobilefacenet_path):
@@ -51,9 +68,20 @@ class FaceEncoder:
             self.yunet_path, "", (320, 320), DETECTION_THRESHOLD, 0.3, 5000
         )
         self.recognizer = cv2.dnn.readNetFromONNX(self.mobilefacenet_path)
+        backend, target = dnn_backend_target()
+        self.recognizer.setPreferableBackend(backend)
+        self.recognizer.setPreferableTarget(target)
 
     def _load_existing_data(self):
+        self.known_embeddings = []
+        self.known_names = []
         if os.path.exists(self.embeddings_file) and os.path.exists(self.names_file):
+            stored = stored_embedding_precision(self.meta_file)
+            if stored != embedding_precision():
+                # Built by another embedder - unusable; empty lists make every entry point re-encode all
+                logger.warning(f"Embeddings were encoded at {stored}, model is now {embedding_precision()}. "
+                               "Re-encoding everyone.")
+                return
             try:
                 self.known_embeddings = [emb for emb in np.load(self.embeddings_file)]
                 with open(self.names_file, 'r') as f:
@@ -64,46 +92,38 @@ class FaceEncoder:
                 self.known_embeddings = []
                 self.known_names = []
 
-    def process_images(self):
+    def process_images(self, preloaded=None, batch_size=EMBED_BATCH_SIZE):
+        """
+        Encode any new images under known_faces_dir and drop embeddings of deleted users.
+        preloaded: optional {path: BGR ndarray} of images already in memory (e.g. the
+        crops the HMI just captured) - used instead of decoding those files again.
+        batch_size: faces per MobileFaceNet forward pass.
+        Full scan; after a single Add/Delete prefer add_user() / remove_user().
+        """
         if not os.path.exists(self.known_faces_dir):
             logger.warning(f"No {self.known_faces_dir} directory found.")
             return False
 
-        current_images = {}
+        preloaded = {os.path.normpath(p): img for p, img in (preloaded or {}).items()}
         new_images = []
 
         # 1. Scan directory
         for root, dirs, files in os.walk(self.known_faces_dir):
-            for file in files:
-                if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    path = os.path.join(root, file)
-                    new_images.append(path)
+            new_images.extend(self._image_paths(root, files))
+        # In-memory crops may not have reached the disk yet
+        seen = set(new_images)
+        new_images.extend(p for p in preloaded if p not in seen)
 
         # 2. Hybrid Incremental Learning
-        processed_log_path = os.path.join(os.path.dirname(self.embeddings_file), "processed_images.json")
-        processed_files = set()
-        
-        # [FIX] If we have no embeddings, we MUST ignore the processed log to force re-training
-        if len(self.known_embeddings) == 0:
-            logger.info("No embeddings found. Forcing full re-scan.")
-            if os.path.exists(processed_log_path):
-                try:
-                    os.remove(processed_log_path)
-                except: pass
-        elif os.path.exists(processed_log_path):
-            with open(processed_log_path, 'r') as f:
-                processed_files = set(json.load(f))
+        processed_files = self._load_processed_log()
 
         # --- GARBAGE COLLECTION START ---
-        # 1. Identify valid users (folders that exist)
+        # 1. Identify valid users (folders that exist). Identities are full
+        # folder names ("ID_Name" or "Name"), see _identity_for
         valid_users = set()
         for d in os.listdir(self.known_faces_dir):
             if os.path.isdir(os.path.join(self.known_faces_dir, d)):
-                # Extract user name from folder "ID_Name" or "Name"
-                if "_" in d:
-                    valid_users.add(d.split('_')[1])
-                else:
-                    valid_users.add(d)
+                valid_users.add(d)
         
         # 2. Filter existing embeddings
         initial_count = len(self.known_names)
@@ -142,47 +162,217 @@ class FaceEncoder:
         if images_to_process:
             logger.info(f"Found {len(images_to_process)} new images.")
         
-        count = 0
-        for img_path in images_to_process:
-            try:
-                emb, name = self._process_single_image(img_path)
-                if emb is not None:
-                    self.known_embeddings.append(emb)
-                    self.known_names.append(name)
-                    processed_files.add(img_path)
-                    count += 1
-            except Exception as e:
-                logger.error(f"Error processing {img_path}: {e}")
+        count = self._encode_paths(images_to_process, preloaded, processed_files, batch_size)
 
         # 3. Save Updates
         if count > 0 or deleted_count > 0:
-            np.save(self.embeddings_file, np.array(self.known_embeddings))
-            with open(self.names_file, 'w') as f:
-                json.dump(self.known_names, f)
-            
-            with open(processed_log_path, 'w') as f:
-                json.dump(list(processed_files), f)
-                
+            self._save(processed_files)
             logger.info(f"Changes saved. Added: {count}, Deleted: {deleted_count}. Total: {len(self.known_embeddings)}")
         
         return True
 
-    def _process_single_image(self, img_path):
-        folder_name = os.path.basename(os.path.dirname(img_path))
+    def add_user(self, user_dir, preloaded=None, batch_size=EMBED_BATCH_SIZE):
+        """
+        Encode only the new images of one user folder and append them to the saved set.
+        preloaded: as in process_images (crops still in memory / in the write queue).
+        """
+        if len(self.known_embeddings) == 0:
+            # Nothing saved yet (or it was lost) - everyone needs encoding
+            return self.process_images(preloaded=preloaded, batch_size=batch_size)
+
+        user_dir = os.path.normpath(user_dir)
+        preloaded = {os.path.normpath(p): img for p, img in (preloaded or {}).items()}
+
+        paths = []
+        if os.path.isdir(user_dir):
+            paths = self._image_paths(user_dir, os.listdir(user_dir))
+        seen = set(paths)
+        paths.extend(p for p in preloaded if p not in seen and os.path.dirname(p) == user_dir)
+
+        processed_files = self._load_processed_log()
+        paths = [p for p in paths if p not in processed_files]
+        if not paths:
+            logger.info(f"No new images for {os.path.basename(user_dir)}.")
+            return True
+
+        count = self._encode_paths(paths, preloaded, processed_files, batch_size)
+        if count > 0:
+            self._save(processed_files)
+        logger.info(f"Added {count} embeddings for {os.path.basename(user_dir)}. Total: {len(self.known_embeddings)}")
+        return True
+
+    def remove_user(self, user):
+        """Drop a user's embeddings (user = folder name, e.g. "101_Atharv") without re-encoding anyone."""
+        if len(self.known_embeddings) == 0:
+            # Nothing usable saved (or encoded by another model) - rebuild from the remaining folders
+            return self.process_images()
+
+        keep = [i for i, name in enumerate(self.known_names) if name != user]
+        removed = len(self.known_names) - len(keep)
+
+        user_dir = os.path.normpath(os.path.join(self.known_faces_dir, user))
+        processed_files = {p for p in self._load_processed_log() if os.path.dirname(p) != user_dir}
+
+        if removed > 0:
+            self.known_embeddings = [self.known_embeddings[i] for i in keep]
+            self.known_names = [self.known_names[i] for i in keep]
+        self._save(processed_files)
+        logger.info(f"Removed {removed} embeddings for {user}. Total: {len(self.known_embeddings)}")
+        return True
+
+    def _image_paths(self, root, files):
+        return [os.path.normpath(os.path.join(root, f)) for f in files
+                if f.lower().endswith(('.jpg', '.jpeg', '.png', '.ppm'))]
+
+    def _processed_log_path(self):
+        return os.path.join(os.path.dirname(self.embeddings_file), "processed_images.json")
+
+    def _load_processed_log(self):
+        """Set of already-encoded image paths (empty, and the log dropped, if there are no embeddings)."""
+        processed_log_path = self._processed_log_path()
+        # [FIX] If we have no embeddings, we MUST ignore the processed log to force re-training
+        if len(self.known_embeddings) == 0:
+            logger.info("No embeddings found. Forcing full re-scan.")
+            if os.path.exists(processed_log_path):
+                try:
+                    os.remove(processed_log_path)
+                except: pass
+            return set()
+        if os.path.exists(processed_log_path):
+            with open(processed_log_path, 'r') as f:
+                return set(json.load(f))
+        return set()
+
+    def _encode_paths(self, paths, preloaded, processed_files, batch_size=EMBED_BATCH_SIZE):
+        """Detect, align and embed `paths`; appends to the known lists and processed_files. Returns count added."""
+        # Detect + align per image (in parallel), then embed in batches
+        face_imgs, face_names, face_paths = [], [], []
+        for img_path, face_img in zip(paths, self._extract_faces(paths, preloaded)):
+            if face_img is not None:
+                face_imgs.append(face_img)
+                face_names.append(self._identity_for(img_path))
+                face_paths.append(img_path)
+
+        count = 0
+        for start in range(0, len(face_imgs), batch_size):
+            if self._stopping():
+                # Keep what's done; the rest isn't in processed_files, so the next run picks it up
+                logger.info(f"Stop requested - encoded {count} of {len(face_imgs)} faces.")
+                break
+            end = start + batch_size
+            try:
+                embeddings = self._embed_batch(face_imgs[start:end])
+            except Exception as e:
+                logger.error(f"Error embedding batch {start}-{end}: {e}")
+                continue
+            for emb, name, img_path in zip(embeddings, face_names[start:end], face_paths[start:end]):
+                self.known_embeddings.append(emb)
+                self.known_names.append(name)
+                processed_files.add(img_path)
+                count += 1
+        return count
+
+    def _stopping(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def _save(self, processed_files):
+        np.save(self.embeddings_file, np.array(self.known_embeddings))
+        with open(self.names_file, 'w') as f:
+            json.dump(self.known_names, f)
+        
+        with open(self._processed_log_path(), 'w') as f:
+            json.dump(list(processed_files), f)
+        with open(self.meta_file, 'w') as f:
+            json.dump({"precision": embedding_precision(), "model": os.path.basename(self.mobilefacenet_path)}, f)
+
+    def _extract_faces(self, paths, preloaded):
+        """Aligned face (or None) for each path, in order - cut short if a stop is requested."""
+        to_read = [p for p in paths if p not in preloaded]
+        if self.parallel and len(to_read) >= PARALLEL_MIN_IMAGES and _worker_count() > 1:
+            try:
+                return self._extract_faces_parallel(paths, preloaded, to_read)
+            except Exception as e:
+                logger.warning(f"Parallel extraction failed ({e}), falling back to in-process.")
+
+        faces = []
+        images = self._read_images(paths, preloaded)
+        for img_path, img in zip(paths, images):
+            if self._stopping():
+                logger.info(f"Stop requested - extracted {len(faces)} of {len(paths)} images.")
+                break
+            try:
+                faces.append(self._extract_face(img, img_path))
+            except Exception as e:
+                logger.error(f"Error processing {img_path}: {e}")
+                faces.append(None)
+        images.close() # Drops reads still queued if we stopped early
+        return faces
+
+    def _extract_faces_parallel(self, paths, preloaded, to_read):
+        # spawn, not fork: a fresh interpreter, no inherited threads or model state
+        ctx = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(max_workers=_worker_count(), mp_context=ctx, initializer=_worker_init)
+        extracted = {}
+        try:
+            # Results arrive in order as chunks complete
+            for img_path, face_img in zip(to_read, pool.map(_worker_extract_face, to_read, chunksize=8)):
+                extracted[img_path] = face_img
+                if self._stopping():
+                    break
+        finally:
+            pool.shutdown(cancel_futures=True) # Only the chunks already running are waited for
+        if len(extracted) < len(to_read):
+            logger.info(f"Stop requested - extracted {len(extracted)} of {len(to_read)} images.")
+            # Keep order: cut at the first path not extracted
+            faces = []
+            for p in paths:
+                if p not in preloaded and p not in extracted:
+                    break
+                faces.append(extracted[p] if p in extracted else self._extract_face(preloaded[p], p))
+            return faces
+        logger.info(f"Extracted {len(to_read)} images in {_worker_count()} worker processes.")
+        return [extracted[p] if p in extracted else self._extract_face(preloaded[p], p)
+                for p in paths]
+
+    def _read_images(self, paths, preloaded):
+        """Images for paths in order (None if unreadable); preloaded ones skip the decode.
+        A generator: close() it to cancel the reads not yet started."""
+        to_read = [p for p in paths if p not in preloaded]
+        pool = ThreadPoolExecutor(max_workers=READ_WORKERS) if to_read else None
+        try:
+            read = pool.map(cv2.imread, to_read) if pool else iter(())
+            for p in paths:
+                yield preloaded[p] if p in preloaded else next(read)
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+    def _identity_for(self, img_path):
         # Use simple folder name as identity (e.g. "101_Atharv")
         # Logic to split ID and Name will be handled in HMI or Database
-        user_name = folder_name
+        return os.path.basename(os.path.dirname(img_path))
 
+    def _process_single_image(self, img_path):
         img = cv2.imread(img_path)
-        if img is None: return None, None
+        face_img = self._extract_face(img, img_path)
+        if face_img is None:
+            return None, None
+        return self._embed_batch([face_img])[0], self._identity_for(img_path)
+
+    def _extract_face(self, img, img_path):
+        """Detect the largest face in `img` and return it aligned (or cropped), else None."""
+        if img is None: return None
 
         h, w, _ = img.shape
-        self.detector.setInputSize((w, h))
+        # Captures share one size - only reconfigure YuNet when it changes
+        if (w, h) != self._input_size:
+            self.detector.setInputSize((w, h))
+            self._input_size = (w, h)
 
         _, faces = self.detector.detect(img)
         
         if faces is None or len(faces) == 0:
-            return None, None
+            return None
 
         # Take largest face
         face = max(faces, key=lambda f: f[2] * f[3])
@@ -208,18 +398,56 @@ class FaceEncoder:
             x = max(0, x); y = max(0, y)
             w_box = min(w_box, w - x); h_box = min(h_box, h - y)
             
-            if w_box <= 0 or h_box <= 0: return None, None
+            if w_box <= 0 or h_box <= 0: return None
             face_img = img[y:y+h_box, x:x+w_box]
 
-        blob = cv2.dnn.blobFromImage(face_img, 1.0/128.0, (112, 112), (127.5, 127.5, 127.5), swapRB=True)
-        self.recognizer.setInput(blob)
-        embedding = self.recognizer.forward()
-        embedding_norm = cv2.normalize(embedding, None, alpha=1, beta=0, norm_type=cv2.NORM_L2)
-        
-        return embedding_norm.flatten(), user_name
+        return face_img
+
+    def _embed_batch(self, face_imgs):
+        """
+        L2-normalized embeddings (N, D) for a list of face images in one forward pass.
+        Falls back to one image per pass if the ONNX graph is fixed to batch size 1.
+        """
+        blob = cv2.dnn.blobFromImages(face_imgs, 1.0/128.0, (112, 112), (127.5, 127.5, 127.5), swapRB=True)
+        try:
+            self.recognizer.setInput(blob)
+            embeddings = self.recognizer.forward().reshape(len(face_imgs), -1)
+        except cv2.error:
+            embeddings = []
+            for i in range(len(face_imgs)):
+                self.recognizer.setInput(blob[i:i+1])
+                embeddings.append(self.recognizer.forward().flatten())
+            embeddings = np.array(embeddings)
+
+        # int8/fp16 models may hand back a narrower dtype - normalize in float32
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+# ─── Worker processes (full re-scans) ────────────────────────────────────────
+
+_worker_encoder = None
+
+def _worker_count():
+    try:
+        return len(os.sched_getaffinity(0)) # Honours the TrainThread core pinning
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _worker_init():
+    global _worker_encoder
+    cv2.setNumThreads(1) # One core per worker - don't oversubscribe
+    _worker_encoder = FaceEncoder(load_data=False)
+
+def _worker_extract_face(img_path):
+    try:
+        return _worker_encoder._extract_face(cv2.imread(img_path), img_path)
+    except Exception as e:
+        logger.error(f"Error processing {img_path}: {e}")
+        return None
 
 def main():
-    encoder = FaceEncoder()
+    encoder = FaceEncoder(parallel=True)
     encoder.process_images()
 
 if __name__ == "__main__":
@@ -13,9 +13,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Recognizer")
 
 from shared.config import (
-    YUNET_PATH, MOBILEFACENET_PATH, 
-    EMBEDDINGS_FILE, NAMES_FILE,
-    DETECTION_THRESHOLD, RECOGNITION_THRESHOLD
+    EMBEDDINGS_FILE, NAMES_FILE, EMBEDDINGS_META_FILE,
+    DETECTION_THRESHOLD, RECOGNITION_THRESHOLD,
+    MODEL_PRECISION, MOBILEFACENET_INT8_PATH, model_paths
 )
 
 # [NEW] Import Aligner
@@ -26,10 +26,54 @@ except ImportError:
     aligner = None
 
 
+def _cuda_available():
+    """True if this OpenCV build has the CUDA DNN backend and sees a GPU."""
+    try:
+        return hasattr(cv2.dnn, "DNN_BACKEND_CUDA") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+def dnn_backend_target():
+    """(backend, target) for MODEL_PRECISION - shared with FaceEncoder so both embed alike."""
+    backend, target = cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU
+    if MODEL_PRECISION == "fp16":
+        # Only available in newer OpenCV builds
+        target = getattr(cv2.dnn, "DNN_TARGET_CPU_FP16", cv2.dnn.DNN_TARGET_CPU)
+    if _cuda_available():
+        # Jetson / CUDA builds of OpenCV: run both nets on the GPU
+        backend = cv2.dnn.DNN_BACKEND_CUDA
+        target = cv2.dnn.DNN_TARGET_CUDA_FP16 if MODEL_PRECISION == "fp16" else cv2.dnn.DNN_TARGET_CUDA
+    return backend, target
+
+
+def embedding_precision():
+    """Precision the embeddings are really computed at, for the gallery meta file: "int8" only
+    if the INT8 model file is used, "fp16" only if this OpenCV build has an FP16 target."""
+    if MODEL_PRECISION == "int8":
+        return "int8" if model_paths()[1] == MOBILEFACENET_INT8_PATH else "fp32"
+    if MODEL_PRECISION == "fp16":
+        _, target = dnn_backend_target()
+        if target != cv2.dnn.DNN_TARGET_CPU: # CPU_FP16 or CUDA_FP16 - else it fell back to FP32
+            return "fp16"
+    return "fp32"
+
+
+def stored_embedding_precision(meta_file=EMBEDDINGS_META_FILE):
+    """Precision embeddings.npy was built at. No meta file = built before it existed, i.e. FP32."""
+    try:
+        with open(meta_file, 'r') as f:
+            return json.load(f).get("precision", "fp32")
+    except FileNotFoundError:
+        return "fp32"
+    except (OSError, ValueError, AttributeError) as e:
+        logger.error(f"Unreadable {meta_file}: {e}")
+        return None
+
+
 class FaceRecognizer:
     def __init__(self):
-        self.yunet_path = YUNET_PATH
-        self.mobilefacenet_path = MOBILEFACENET_PATH
+        self.yunet_path, self.mobilefacenet_path = model_paths()
         self.embeddings_file = EMBEDDINGS_FILE
         self.names_file = NAMES_FILE
         
@@ -37,6 +81,7 @@ class FaceRecognizer:
         self.recognizer = None
         self.known_embeddings = []
         self.known_names = []
+        self._input_size = None # Last size passed to detector.setInputSize
         
         self._load_models()
         self._load_database()
@@ -46,83 +91,146 @@ class FaceRecognizer:
             logger.error("Models not found.")
             return
 
+        backend, target = dnn_backend_target()
+
         self.detector = cv2.FaceDetectorYN.create(
-            self.yunet_path, "", (320, 320), DETECTION_THRESHOLD, 0.3, 5000
+            self.yunet_path, "", (320, 320), DETECTION_THRESHOLD, 0.3, 5000,
+            backend, target
         )
         self.recognizer = cv2.dnn.readNetFromONNX(self.mobilefacenet_path)
-        logger.info("Models loaded successfully.")
+        self.recognizer.setPreferableBackend(backend)
+        self.recognizer.setPreferableTarget(target)
+        device = "CUDA" if backend != cv2.dnn.DNN_BACKEND_OPENCV else "CPU"
+        logger.info(f"Models loaded successfully ({embedding_precision()}, {device}).")
 
     def _load_database(self):
+        self.known_embeddings, self.known_names = self.read_database()
+
+    def read_database(self):
+        """(embeddings matrix, names) from disk - doesn't touch the live ones or the models."""
         if os.path.exists(self.embeddings_file) and os.path.exists(self.names_file):
+            stored = stored_embedding_precision()
+            if stored != embedding_precision():
+                # Scores against another model's embeddings don't mean what the threshold assumes
+                logger.error(f"Database was encoded at {stored}, live model is {embedding_precision()} "
+                             "- ignoring it until it is re-encoded.")
+                return [], []
             try:
-                self.known_embeddings = np.load(self.embeddings_file)
+                embeddings = self._as_matrix(np.load(self.embeddings_file))
                 with open(self.names_file, 'r') as f:
-                    self.known_names = json.load(f)
-                logger.info(f"Loaded {len(self.known_embeddings)} identities.")
+                    names = json.load(f)
+                logger.info(f"Loaded {len(embeddings)} identities.")
+                return embeddings, names
             except Exception as e:
                 logger.error(f"Failed to load database: {e}")
-                self.known_embeddings = []
-                self.known_names = []
         else:
             logger.warning("No database found.")
+        return [], []
 
-    def recognize_faces(self, frame):
-        if self.detector is None or self.recognizer is None:
-            return [], []
+    def set_database(self, embeddings, names):
+        """Swap in a database from read_database(). Call between recognize_faces() calls."""
+        self.known_embeddings, self.known_names = embeddings, names
+
+    @staticmethod
+    def _as_matrix(embeddings):
+        """Known embeddings as one contiguous, L2-normalized float32 (N, D) matrix for matching."""
+        known = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if known.ndim != 2 or len(known) == 0:
+            return known
+        norms = np.linalg.norm(known, axis=1, keepdims=True)
+        return known / np.maximum(norms, 1e-12)
+
+    def set_input_size(self, size):
+        """Set the detector input (w, h); YuNet reallocates its buffers, so skip no-op calls."""
+        if size != self._input_size:
+            self.detector.setInputSize(size)
+            self._input_size = size
+
+    def _embed(self, face_imgs):
+        """L2-normalized float32 embeddings (N, D) for aligned faces, batched into one forward."""
+        # MobileFaceNet expects RGB: blobFromImages with swapRB=True converts from BGR
+        blob = cv2.dnn.blobFromImages(face_imgs, 1.0/128.0, (112, 112), (127.5, 127.5, 127.5), swapRB=True)
+        try:
+            self.recognizer.setInput(blob)
+            embeddings = self.recognizer.forward().reshape(len(face_imgs), -1)
+        except cv2.error:
+            # ONNX graph fixed to batch size 1
+            embeddings = []
+            for i in range(len(face_imgs)):
+                self.recognizer.setInput(blob[i:i+1])
+                embeddings.append(self.recognizer.forward().ravel())
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def detect(self, frame, detect_frame=None):
+        """
+        YuNet faces (N, 15) in `frame` coordinates, or None.
+        detect_frame: optional image used only for detection (e.g. a downscaled
+        gray-as-BGR copy); boxes/landmarks are mapped back to `frame` coordinates.
+        """
+        if self.detector is None:
+            return None
 
         h, w, _ = frame.shape
-        self.detector.setInputSize((w, h))
-        
-        _, faces = self.detector.detect(frame)
+        det = frame if detect_frame is None else detect_frame
+        det_h, det_w = det.shape[:2]
+        self.set_input_size((det_w, det_h))
         
-        face_locations = []
-        face_names = []
-
-        if faces is not None:
-            for face in faces:
-                # Bounding Box
-                box = face[:4].astype(int)
-                x, y, w_box, h_box = box[0], box[1], box[2], box[3]
-                
+        _, faces = self.detector.detect(det)
+        if faces is not None and (det_w, det_h) != (w, h):
+            # x coords at even, y at odd indices of the box + 5 landmarks
+            faces[:, 0:14:2] *= w / det_w
+            faces[:, 1:14:2] *= h / det_h
+        return faces
+
+    def recognize_faces(self, frame, detect_frame=None):
+        """
+        Detect and identify faces in `frame`.
+        detect_frame: as in detect(); alignment and embeddings always use the
+        full-res colour frame.
+        """
+        if self.detector is None or self.recognizer is None:
+            return [], []
+
+        faces = self.detect(frame, detect_frame)
+        if faces is None:
+            return [], []
+        return self.face_locations(faces), self.identify(frame, faces)
+
+    @staticmethod
+    def face_locations(faces):
+        """(x, y, w, h) int boxes for YuNet faces."""
+        return [tuple(box) for box in faces[:, :4].astype(int)]
+
+    def identify(self, frame, faces):
+        """Names ("Unknown" if no match) for YuNet faces already in `frame` coordinates."""
+        face_names = ["Unknown"] * len(faces)
+        aligned, aligned_idx = [], [] # faces that made it through alignment
+
+        if aligner:
+            for i, face in enumerate(faces):
                 # Landmarks for alignment
                 landmarks = face[4:14].reshape((5, 2))
-                
-                face_locations.append((x, y, w_box, h_box))
-                
-                # Alignment
-                # Alignment
-                face_img = None
-                name = "Unknown"
-                
-                if aligner:
-                    try:
-                        face_img = aligner.align(frame, landmarks)
-                        if face_img is not None:
-                            # MobileFaceNet expects RGB. aligner returns same as input (BGR if frame is BGR).
-                            # We need to ensure blobFromImage parameters are correct.
-                            # blobFromImage takes BGR if swapRB=True --> RGB.
-                            # Our previous code used `swapRB=True`.
-                            
-                            # Get embedding
-                            blob = cv2.dnn.blobFromImage(face_img, 1.0/128.0, (112, 112), (127.5, 127.5, 127.5), swapRB=True)
-                            self.recognizer.setInput(blob)
-                            embedding = self.recognizer.forward()
-                            embedding_norm = cv2.normalize(embedding, None, alpha=1, beta=0, norm_type=cv2.NORM_L2)
-                            
-                            # Compare
-                            if len(self.known_embeddings) > 0:
-                                scores = np.dot(self.known_embeddings, embedding_norm.T).flatten()
-                                best_match_idx = np.argmax(scores)
-                                max_score = scores[best_match_idx]
-                                
-                                if max_score > RECOGNITION_THRESHOLD:
-                                    name = self.known_names[best_match_idx]
-                    except Exception as e:
-                        logger.error(f"Inference error: {e}")
-                else:
-                    # Fallback (same as original logic but inside else)
-                    pass 
-
-                face_names.append(name)
-
-        return face_locations, face_names
+                try:
+                    face_img = aligner.align(frame, landmarks)
+                    if face_img is not None:
+                        aligned.append(face_img)
+                        aligned_idx.append(i)
+                except Exception as e:
+                    logger.error(f"Alignment error: {e}")
+
+        # All faces embedded in one forward pass and matched with one GEMM
+        if aligned and len(self.known_embeddings) > 0:
+            try:
+                embeddings = self._embed(aligned)
+                scores = embeddings @ self.known_embeddings.T # (faces, known)
+                best = np.argmax(scores, axis=1)
+                best_scores = scores[np.arange(len(best)), best]
+                for i, idx, score in zip(aligned_idx, best, best_scores):
+                    if score > RECOGNITION_THRESHOLD:
+                        face_names[i] = self.known_names[idx]
+            except Exception as e:
+                logger.error(f"Inference error: {e}")
+
+        return face_names
@@ -2,18 +2,81 @@
 import cv2
 import threading
 import time
+import numpy as np
+
+# Python GStreamer bindings (optional) - lets us read appsink buffers without the
+# extra copy OpenCV's CAP_GSTREAMER backend makes into its own cv::Mat
+try:
+    import gi
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+    Gst.init(None)
+    GST_AVAILABLE = True
+except (ImportError, ValueError):
+    GST_AVAILABLE = False
+
+
+class GstAppSinkCapture:
+    """
+    Minimal VideoCapture-like reader over a GStreamer appsink.
+    read() returns a numpy view onto the mapped GStreamer buffer (no copy). The
+    two most recent frames stay mapped, so the previous frame is still valid while
+    the next one is being pulled.
+    """
+    def __init__(self, pipeline, width=640, height=480):
+        self.width = width
+        self.height = height
+        self._mapped = []  # [(buffer, map_info), ...] oldest first
+        self.pipeline = Gst.parse_launch(pipeline)
+        self.sink = self.pipeline.get_by_name("sink")
+        ret = self.pipeline.set_state(Gst.State.PLAYING)
+        self._opened = self.sink is not None and ret != Gst.StateChangeReturn.FAILURE
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self):
+        sample = self.sink.emit("try-pull-sample", Gst.SECOND)
+        if sample is None:
+            return False, None
+        buf = sample.get_buffer()
+        ok, info = buf.map(Gst.MapFlags.READ)
+        if not ok:
+            return False, None
+        self._mapped.append((buf, info))
+        while len(self._mapped) > 2:
+            old_buf, old_info = self._mapped.pop(0)
+            old_buf.unmap(old_info)
+        frame = np.frombuffer(info.data, dtype=np.uint8).reshape(self.height, self.width, 3)
+        return True, frame
+
+    def release(self):
+        self.pipeline.set_state(Gst.State.NULL)
+        for buf, info in self._mapped:
+            buf.unmap(info)
+        self._mapped = []
+        self._opened = False
+
 
 class Camera:
     def __init__(self, source=0):
         self.source = source
+        self.cap = None
         # Try GStreamer pipeline for Libcamera on Raspberry Pi
+        # max-buffers=1 drop=true: always hand out the latest frame, never a backlog
         gst_pipeline = (
             "libcamerasrc ! video/x-raw, width=640, height=480, framerate=30/1 ! "
-            "videoconvert ! videoscale ! video/x-raw, format=BGR ! appsink"
+            "videoconvert ! videoscale ! video/x-raw, format=BGR ! "
+            "appsink name=sink max-buffers=1 drop=true sync=false"
         )
-        # Attempt to open using GStreamer first
-        self.cap = cv2.VideoCapture(gst_pipeline, cv2.CAP_GSTREAMER)
-        if not self.cap.isOpened():
+        # Attempt to open using GStreamer first (zero-copy appsink)
+        if GST_AVAILABLE:
+            try:
+                self.cap = GstAppSinkCapture(gst_pipeline)
+            except Exception as e:
+                print(f"[Camera] GStreamer error: {e}")
+                self.cap = None
+        if self.cap is None or not self.cap.isOpened():
              print("[Camera] GStreamer pipeline failed, falling back to index 0...")
              self.cap = cv2.VideoCapture(self.source)
         self.ret = False
@@ -34,6 +34,7 @@ def _get_conn():
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")   # safe for concurrent readers
+    conn.execute("PRAGMA synchronous=NORMAL") # WAL: fsync at checkpoints, not every commit
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
@@ -212,13 +213,35 @@ class LocalDatabase:
     # ── Add record ────────────────────────────────────────────────────────────
 
     def add_record(self, device_id: str, name: str, user_id: str = None, confidence: float = 0.0):
-        dt_now    = datetime.now()
+        with _get_conn() as conn:
+            return self._insert_punch(conn, self.get_user_shift(), device_id, name,
+                                      user_id, confidence, datetime.now())
+
+    def add_records_batch(self, records: list):
+        """
+        Insert several punches in one transaction.
+        records: [(device_id, name, user_id, confidence, punch_datetime), ...] in punch order.
+        Cooldown and IN/OUT toggling see earlier punches of the same batch.
+        Returns the list of row ids (None for punches ignored by the cooldown).
+        """
+        if not records:
+            return []
+        shift = self.get_user_shift()
+        with _get_conn() as conn:
+            return [self._insert_punch(conn, shift, *rec) for rec in records]
+
+    def _insert_punch(self, conn, shift, device_id, name, user_id, confidence, dt_now):
         p_date    = dt_now.date().isoformat()
         p_time    = dt_now.time().strftime("%H:%M:%S")
         user_id   = user_id or name
 
         # Cooldown: prevent double punches within 60 s
-        last_punch = self.get_last_punch_today(user_id)
+        cur = conn.execute("""
+            SELECT punch_time, punch_type FROM attendance_log
+            WHERE user_id = ? AND punch_date = ?
+            ORDER BY punch_time DESC LIMIT 1
+        """, (user_id, p_date))
+        last_punch = cur.fetchone()
         if last_punch:
             last_dt = datetime.fromisoformat(last_punch['punch_time'])
             if (dt_now - last_dt).total_seconds() < 60:
@@ -231,26 +254,23 @@ class LocalDatabase:
             punch_type = 'OUT'
 
         # Shift & status
-        shift    = self.get_user_shift(user_id)
         shift_id = shift['id'] if shift else None
         status, late, early, ot = self.calculate_attendance_status(dt_now, punch_type, shift)
 
-        with _get_conn() as conn:
-            cur = conn.execute("""
-                INSERT INTO attendance_log
-                    (user_id, name, device_id, punch_time, punch_date, punch_clock,
-                     punch_type, shift_id, attendance_status,
-                     late_minutes, early_departure_minutes, overtime_minutes,
-                     confidence, lan_synced, mqtt_synced)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,0,0)
-            """, (user_id, name, device_id,
-                  dt_now.isoformat(sep=' '), p_date, p_time,
-                  punch_type, shift_id, status,
-                  late, early, ot, confidence))
-            row_id = cur.lastrowid
+        cur = conn.execute("""
+            INSERT INTO attendance_log
+                (user_id, name, device_id, punch_time, punch_date, punch_clock,
+                 punch_type, shift_id, attendance_status,
+                 late_minutes, early_departure_minutes, overtime_minutes,
+                 confidence, lan_synced, mqtt_synced)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,0,0)
+        """, (user_id, name, device_id,
+              dt_now.isoformat(sep=' '), p_date, p_time,
+              punch_type, shift_id, status,
+              late, early, ot, confidence))
 
         logger.info("Saved %s for %s | status=%s late=%dm ot=%dm", punch_type, name, status, late, ot)
-        return row_id
+        return cur.lastrowid
 
     # ── Sync queries — LAN ────────────────────────────────────────────────────
 
@@ -319,19 +339,22 @@ class LocalDatabase:
         """
         if not user_list:
             return
+        rows = []
+        for u in user_list:
+            uid  = u.get("user_id") or u.get("id")
+            name = u.get("name") or u.get("employee_name")
+            if uid and name:
+                rows.append((str(uid), str(name)))
+        # One prepared statement, one transaction (committed by the context manager)
         with _get_conn() as conn:
-            for u in user_list:
-                uid  = u.get("user_id") or u.get("id")
-                name = u.get("name") or u.get("employee_name")
-                if uid and name:
-                    conn.execute("""
-                        INSERT INTO users (user_id, name, synced_at)
-                        VALUES (?, ?, datetime('now','localtime'))
-                        ON CONFLICT(user_id) DO UPDATE SET
-                            name      = excluded.name,
-                            synced_at = excluded.synced_at
-                    """, (str(uid), str(name)))
-        logger.info("Upserted %d users into local users table.", len(user_list))
+            conn.executemany("""
+                INSERT INTO users (user_id, name, synced_at)
+                VALUES (?, ?, datetime('now','localtime'))
+                ON CONFLICT(user_id) DO UPDATE SET
+                    name      = excluded.name,
+                    synced_at = excluded.synced_at
+            """, rows)
+        logger.info("Upserted %d users into local users table.", len(rows))
 
     def get_all_users(self) -> list:
         """Return all employees from local cache, ordered by name."""
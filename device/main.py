@@ -3,6 +3,7 @@ import cv2
 import time
 import sys
 import os
+from collections import OrderedDict
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -28,8 +29,10 @@ def main():
     camera.start()
 
     # Cooldown mechanism to avoid spamming the same attendance
-    last_attendance = {}
+    # LRU-capped so a long session can't grow it without bound; monotonic so clock jumps don't matter
+    last_attendance = OrderedDict()
     COOLDOWN_SECONDS = 60
+    MAX_TRACKED = 512
 
     try:
         while True:
@@ -42,7 +45,7 @@ def main():
             face_locations, face_names = recognizer.recognize_faces(frame)
 
             # Process results
-            current_time = time.time()
+            current_time = time.monotonic()
             for (top, right, bottom, left), name in zip(face_locations, face_names):
                 # Draw box
                 cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 2)
@@ -56,6 +59,9 @@ def main():
                         print(f"Marking attendance for: {name}")
                         db.add_record(DEVICE_ID, name)
                         last_attendance[name] = current_time
+                        last_attendance.move_to_end(name)
+                        if len(last_attendance) > MAX_TRACKED:
+                            last_attendance.popitem(last=False)
 
             cv2.imshow('Video', frame)
 
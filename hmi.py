@@ -7,6 +7,10 @@ import shutil
 import socket
 import json
 import ssl
+import queue
+import threading
+from enum import IntEnum
+from functools import lru_cache
 import numpy as np
 from datetime import datetime
 
@@ -19,22 +23,69 @@ try:
 except ImportError:
     PICAMERA2_AVAILABLE = False
 
+# orjson parses MQTT payloads (bytes) several times faster; stdlib json takes bytes too
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QPushButton, QLineEdit, 
                              QStackedWidget, QMessageBox, QFrame, QSizePolicy, 
-                             QGraphicsDropShadowEffect, QListWidget, QListWidgetItem, QGridLayout,
-                             QToolButton)
-from PyQt5.QtCore import QTimer, Qt, QThread, pyqtSignal, QPropertyAnimation, QEasingCurve, QSize, QMutex
-from PyQt5.QtGui import QImage, QPixmap, QFont, QColor, QPainter, QPen, QBrush, QIcon
+                             QGraphicsDropShadowEffect, QGridLayout,
+                             QToolButton, QListView, QAbstractItemView)
+from PyQt5.QtCore import (QTimer, Qt, QThread, pyqtSignal, QPropertyAnimation, QEasingCurve, QSize, QMutex, QEvent,
+                          QFileSystemWatcher, QAbstractListModel, QModelIndex, QObject, QRunnable, QThreadPool,
+                          QStringListModel)
+from PyQt5.QtGui import QImage, QPixmap, QFont, QFontMetrics, QColor, QPainter, QPen, QBrush, QIcon
+
+class Mode(IntEnum):
+    """VideoThread mode - one shared member per value, so the loop can branch with `is`."""
+    IDLE = 0
+    RECOGNITION = 1
+    CAPTURE = 2
+
+# QImage.Format_BGR888 only exists on Qt >= 5.14
+HAS_QIMAGE_BGR888 = hasattr(QImage, "Format_BGR888")
+
+# Detector input size used while capturing (boxes are scaled back to the frame)
+CAPTURE_DETECT_SIZE = (320, 240)
+# Detector input size for recognition - ~4x fewer detector FLOPs than 640x480;
+# landmarks are mapped back so alignment/embeddings still use the full-res frame
+RECOGNITION_DETECT_SIZE = (320, 240)
+# Run the recognizer on every Nth frame; the frames in between redraw the cached boxes
+RECOGNITION_STRIDE = 3
+# A recognized face whose box overlaps last pass's box by more than this keeps its name
+# without being embedded again; every REVERIFY_EVERY passes (~15 frames) all are re-checked
+SAME_FACE_IOU = 0.85
+REVERIFY_EVERY = 5
+# A recognized name is sent to the GUI at most once per this many seconds
+MATCH_EMIT_INTERVAL = 2.0
+# In IDLE (register screen before capture) only every Nth frame is decoded and shown (~8 FPS)
+IDLE_STRIDE = 3
+# In RECOGNITION, frames that aren't recognized are only decoded for display every Nth frame
+PREVIEW_STRIDE = 2
+
+# Face corner markers: each corner's anchor as (x + w*i, y + h*j) ...
+CORNER_ANCHORS = np.array([[0, 0], [1, 0], [0, 1], [1, 1]], dtype=np.int32)
+# ... and its 3-point L (arm end, corner, arm end) as unit offsets from the anchor
+CORNER_STROKES = np.array([
+    [[ 1, 0], [0, 0], [0,  1]],   # top-left
+    [[-1, 0], [0, 0], [0,  1]],   # top-right
+    [[ 1, 0], [0, 0], [0, -1]],   # bottom-left
+    [[-1, 0], [0, 0], [0, -1]],   # bottom-right
+], dtype=np.int32)
 
 # Import modules
-from core.recognizer import FaceRecognizer
+from core.recognizer import FaceRecognizer, embedding_precision, stored_embedding_precision
 from device.database import LocalDatabase
 from core.face_encoder import FaceEncoder
 from shared.config import (
-    DEVICE_ID, KNOWN_FACES_DIR, VERIFICATION_FRAMES,
+    DEVICE_ID, KNOWN_FACES_DIR, VERIFICATION_FRAMES, CAMERA_CACHE_FILE,
     MQTT_BROKER, MQTT_PORT, MQTT_USERNAME, MQTT_PASSWORD,
-    MQTT_TOPIC_RECEIVE_USERS, MQTT_TOPIC_REQUEST_USERS
+    MQTT_TOPIC_RECEIVE_USERS, MQTT_TOPIC_REQUEST_USERS, LBP_CASCADE_PATH,
+    EMBEDDINGS_FILE
 )
 
 # --- STYLESHEETS ---
@@ -73,7 +124,7 @@ QPushButton:hover {
 QPushButton:pressed {
     background-color: #74c7ec;
 }
-QListWidget {
+QListView {
     background-color: #313244;
     border-radius: 10px;
     padding: 10px;
@@ -81,16 +132,181 @@ QListWidget {
     font-size: 16px;
     border: 1px solid #45475a;
 }
-QListWidget::item {
+QListView::item {
     padding: 10px;
     border-bottom: 1px solid #45475a;
 }
-QListWidget::item:selected {
+QListView::item:selected {
     background-color: #45475a;
     border-radius: 5px;
 }
+
+/* Shared by every top bar / tile / info card - parsed once here instead of a
+   stylesheet per widget; the helpers below only tag widgets with a property */
+QFrame[topbar="true"], QFrame[topbar="true"] * {
+    background-color: #1e1e2e;
+    border-bottom: 2px solid #585b70;
+}
+QFrame[topbar="true"] QPushButton {
+    background-color: transparent;
+    color: #cdd6f4;
+    font-size: 14px;
+    border: none;
+    font-weight: bold;
+}
+QFrame[topbar="true"] QLabel {
+    color: #cdd6f4;
+    font-size: 16px;
+    font-weight: bold;
+}
+QToolButton[tile="small"] {
+    background-color: #0078d7;
+    color: white;
+    border: none;
+    padding: 5px;
+    font-size: 12px;
+}
+QToolButton[tile="large"] {
+    background-color: #0078d7;
+    color: white;
+    border: none;
+    border-radius: 0px;
+    padding: 10px;
+    font-size: 18px;
+}
+QToolButton[tile="small"]:hover, QToolButton[tile="large"]:hover {
+    background-color: #0063b1;
+}
+QToolButton[tile="large"]:pressed {
+    background-color: #005a9e;
+}
+QFrame[card="true"], QFrame[card="true"] QLabel {
+    background-color: #313244;
+    border-radius: 15px;
+}
+QFrame[card="true"] QLabel#card_label {
+    color: #a6adc8;
+}
+QFrame[accent="#89b4fa"], QFrame[accent="#89b4fa"] QLabel { border-left: 5px solid #89b4fa; }
+QFrame[accent="#a6e3a1"], QFrame[accent="#a6e3a1"] QLabel { border-left: 5px solid #a6e3a1; }
+QFrame[accent="#f9e2af"], QFrame[accent="#f9e2af"] QLabel { border-left: 5px solid #f9e2af; }
+QFrame[accent="#89b4fa"] QLabel#value_label { color: #89b4fa; }
+QFrame[accent="#a6e3a1"] QLabel#value_label { color: #a6e3a1; }
+QFrame[accent="#f9e2af"] QLabel#value_label { color: #f9e2af; }
 """
 
+# --- HELPERS ---
+def write_ppm(filename, bgr_img):
+    """
+    Save a BGR image as raw binary PPM (header + pixels): no JPEG encode cost on the Pi,
+    and FaceEncoder reads it back with cv2.imread. PPM stores RGB, so channels are flipped.
+    """
+    h, w = bgr_img.shape[:2]
+    with open(filename, 'wb') as f:
+        f.write(b'P6\n%d %d\n255\n' % (w, h))
+        f.write(bgr_img[:, :, ::-1].tobytes())
+
+def load_camera_cache():
+    """Camera backend/frame size that worked on the last start ({} if unknown)."""
+    try:
+        with open(CAMERA_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_camera_cache(data):
+    try:
+        with open(CAMERA_CACHE_FILE, 'w') as f:
+            json.dump(data, f)
+    except OSError as e:
+        print(f"Camera cache write failed: {e}")
+
+def box_iou(a, b):
+    """IoU matrix (len(a), len(b)) between two arrays of (x, y, w, h) boxes."""
+    a = a[:, None, :].astype(np.float32)
+    b = b[None, :, :].astype(np.float32)
+    iw = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+# Core split on the Pi: 0-1 for Qt + training, 2-3 for the video loop
+VIDEO_CORES = {2, 3}
+TRAIN_CORES = {0, 1}
+# No frame-driven clock tick for this long (camera stalled or gone) - the 1 Hz timer redraws it
+CLOCK_STALE_SECS = 1.5
+# How long closing the app waits for a stopped retrain to save and exit
+TRAIN_STOP_TIMEOUT_MS = 5000
+
+def pin_current_thread(cores):
+    """Best-effort: restrict the calling thread to `cores` (Linux only, ignored if unavailable)."""
+    try:
+        cores = cores & os.sched_getaffinity(0)
+        if cores:
+            os.sched_setaffinity(0, cores)
+    except (AttributeError, OSError):
+        pass
+
+SIOCGIFADDR = 0x8915
+RTF_UP = 0x0001
+NET_STATUS_INTERVAL_MS = 5000 # Network status timer period
+# Seconds a looked-up local IP is reused - under one status period, so each check sees a fresh state
+LOCAL_IP_TTL = NET_STATUS_INTERVAL_MS / 1000 - 1
+_local_ip_cache = (float('-inf'), None) # (time.monotonic(), ip)
+
+def _default_route_interface():
+    """Interface of the lowest-metric default route in /proc/net/route, None if there is none."""
+    best = None # (metric, iface)
+    with open("/proc/net/route") as f:
+        next(f) # Header
+        for line in f:
+            fields = line.split()
+            if len(fields) < 7 or fields[1] != "00000000" or not int(fields[3], 16) & RTF_UP:
+                continue
+            metric = int(fields[6])
+            if best is None or metric < best[0]:
+                best = (metric, fields[0])
+    return best[1] if best else None
+
+def _interface_ip():
+    """IPv4 of the default-route interface (None = no route, i.e. offline) - Linux only,
+    so docker0 / usb0 / link-local addresses without a route don't count as connected."""
+    import fcntl, struct # Linux only
+    name = _default_route_interface()
+    if name is None:
+        return None
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            packed = fcntl.ioctl(s.fileno(), SIOCGIFADDR, struct.pack('256s', name[:15].encode()))
+        except OSError:
+            return None # Route present but the interface has no IPv4 address
+    return socket.inet_ntoa(packed[20:24])
+
+def local_ip():
+    """This device's LAN IP (None if not connected), cached for LOCAL_IP_TTL seconds."""
+    global _local_ip_cache
+    now = time.monotonic()
+    if now - _local_ip_cache[0] < LOCAL_IP_TTL:
+        return _local_ip_cache[1]
+    try:
+        ip = _interface_ip()
+    except (ImportError, AttributeError, OSError):
+        # No /proc/net/route (not Linux): ask the routing table via a UDP "connect" (sends nothing)
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect(("8.8.8.8", 80))
+                ip = s.getsockname()[0]
+        except OSError:
+            ip = None
+    _local_ip_cache = (now, ip)
+    return ip
+
+@lru_cache(maxsize=None)
+def ui_font(size, bold=False):
+    """Shared "Segoe UI" QFont per (size, bold) - setFont copies it. Call after QApplication exists."""
+    return QFont("Segoe UI", size, QFont.Bold) if bold else QFont("Segoe UI", size)
+
 # --- CUSTOM WIDGETS ---
 class OverlayLabel(QLabel):
     def __init__(self, parent=None):
@@ -115,10 +331,21 @@ class CircularProgress(QWidget):
         super().__init__(parent)
         self.value = 0
         self.setFixedSize(200, 200)
+        # Paint resources built once, not on every repaint
+        self._bg_pen = QPen(QColor("#45475a"), 10)
+        self._fg_pen = QPen(QColor("#89b4fa"), 10)
+        self._text_color = QColor("#cdd6f4")
+        self._font = QFont("Segoe UI", 24, QFont.Bold)
+        # Label metrics for every percentage, measured once
+        fm = QFontMetrics(self._font)
+        self._text_widths = {i: fm.width(f"{i}%") for i in range(101)}
+        self._text_height = fm.height()
 
     def set_value(self, val):
+        changed = int(val) != int(self.value)
         self.value = val
-        self.update()
+        if changed: # Only the integer percentage is drawn
+            self.update()
 
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -128,27 +355,73 @@ class CircularProgress(QWidget):
         painter.translate(rect.center())
         
         # Background Circle
-        pen = QPen(QColor("#45475a"), 10)
-        painter.setPen(pen)
+        painter.setPen(self._bg_pen)
         painter.drawEllipse(-80, -80, 160, 160)
         
         # Progress Arc
         if self.value > 0:
-            pen.setColor(QColor("#89b4fa"))
-            painter.setPen(pen)
+            painter.setPen(self._fg_pen)
             span = int(-self.value * 3.6 * 16) # 360 degrees
             painter.drawArc(-80, -80, 160, 160, 90 * 16, span)
 
         # Text
-        painter.setPen(QColor("#cdd6f4"))
-        painter.setFont(QFont("Segoe UI", 24, QFont.Bold))
-        text = f"{int(self.value)}%"
-        fm = painter.fontMetrics()
-        w = fm.width(text)
-        h = fm.height()
+        painter.setPen(self._text_color)
+        painter.setFont(self._font)
+        pct = int(self.value)
+        text = f"{pct}%"
+        w = self._text_widths.get(pct)
+        if w is None:
+            w = painter.fontMetrics().width(text)
+        h = self._text_height
         painter.drawText(-w//2, h//4, text)
 
 # --- WORKER THREADS ---
+# Employee list row colours, shared by every row
+EMP_FG_REGISTERED = QColor("#a6e3a1")   # green
+EMP_FG_UNREGISTERED = QColor("#f9e2af") # yellow
+EMP_FG_SUMMARY = QColor("#89b4fa")
+EMP_FG_INFO = QColor("#a6adc8")
+# Employee row text (uid, name) and colour, by registration status
+EMP_ROW_STYLE = {
+    True:  ("  ✅  {:<8}  {}", EMP_FG_REGISTERED),
+    False: ("  ⚠️  {:<8}  {}", EMP_FG_UNREGISTERED),
+}
+
+class EmployeeModel(QAbstractListModel):
+    """
+    Employee list rows as plain dicts; the view asks for text/colour only for the rows it
+    shows. Row keys: "text", "color" (QColor), and "user" ({user_id, name, registered})
+    for employee rows - info/summary rows have no "user" and can't be selected.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return row["text"]
+        if role == Qt.ForegroundRole:
+            return row["color"]
+        if role == Qt.UserRole:
+            return row.get("user")
+        return None
+
+    def flags(self, index):
+        if index.isValid() and "user" not in self._rows[index.row()]:
+            return Qt.ItemIsEnabled
+        return super().flags(index)
+
 class VideoThread(QThread):
     change_pixmap_signal = pyqtSignal(QImage)
     attendance_signal = pyqtSignal(str) # Emits name (for recognition) or status (for capture)
@@ -157,38 +430,123 @@ class VideoThread(QThread):
     def __init__(self):
         super().__init__()
         self._run_flag = True
-        self.mode = "RECOGNITION" # "RECOGNITION", "CAPTURE", "IDLE"
+        self.mode = Mode.RECOGNITION
         self.mutex = QMutex()
         self.capture_count = 0
         self.capture_target = 30
         self.capture_dir = ""
+        self.captured_crops = {} # filename -> crop, handed to TrainThread after capture
         self.recognizer = None
+        self._det_buf = None # Reused 3-channel gray frame fed to the detector
+        self._pending_recognizer = None # Built by reload_model(), swapped in by run()
+        self._pending_db = None # (embeddings, names) read by reload_model(), swapped in by run()
+        self._rec_lock = threading.Lock() # Guards the _pending_recognizer / _pending_db hand-off
+        self._cached_results = ([], []) # (locations, names) of the last recognition frame
+        self._cooldown_until = 0.0 # time.monotonic() until which recognition is detect-only
+        self._recognition_pass = 0 # Counts process_recognition passes (for REVERIFY_EVERY)
+        self._last_emitted = {} # name -> time.monotonic() of its last MATCH emit
+        self._emit_enabled = True # False while no video label is on screen (see set_emit)
+        # Reused per-frame scratch buffers (allocated on first use, sized to the frame)
+        self._rgb_buf = None
+        self._last_frame = None # Buffer behind the QImage currently handed to the GUI
+        self._frame_released = threading.Event() # GUI is done with _last_frame
+        self._frame_released.set()
+        self._target_size = None # (w, h) the GUI displays at, None = camera resolution
+        self._scaled_buf = None # Reused output of the resize to _target_size
+        self._small_buf = None
+        self._small_gray_buf = None
+        self._face_prefilter = self._load_face_prefilter()
+
+        # Capture crops are written to disk off the video loop
+        self._io_queue = queue.Queue(maxsize=64)
+        threading.Thread(target=self._io_worker, daemon=True).start()
+
+    def _io_worker(self):
+        while True:
+            filename, img = self._io_queue.get()
+            try:
+                write_ppm(filename, img)
+            except Exception as e:
+                print(f"Capture write error ({filename}): {e}")
+            finally:
+                self._io_queue.task_done()
+
+    def _load_face_prefilter(self):
+        """
+        LBP cascade used to skip YuNet on frames with no face (None if unavailable).
+        Only the LBP 'improved' cascade is fast and reliable enough for this - the default
+        Haar cascade misses faces YuNet finds, so without LBP there is no prefilter at all.
+        """
+        name = "lbpcascade_frontalface_improved.xml"
+        candidates = [LBP_CASCADE_PATH] # scripts/download_models.py puts it in assets/
+        try:
+            # cv2.data only points at haarcascades/; source/distro installs keep the
+            # LBP files in a sibling lbpcascades/ directory
+            data_root = os.path.dirname(os.path.normpath(cv2.data.haarcascades))
+            candidates.append(os.path.join(data_root, "lbpcascades", name))
+        except AttributeError:
+            pass # Distro OpenCV builds don't ship cv2.data
+        candidates += [os.path.join(d, "lbpcascades", name)
+                       for d in ("/usr/share/opencv4", "/usr/share/opencv", "/usr/local/share/opencv4")]
+        for path in candidates:
+            if os.path.exists(path):
+                cascade = cv2.CascadeClassifier(path)
+                if not cascade.empty():
+                    return cascade
+        print("[INFO] LBP face cascade not found - running YuNet on every recognition frame")
+        return None
 
     def set_mode(self, mode):
+        # Lock only orders concurrent transitions; the video loop reads self.mode directly
+        # (rebinding one attribute is atomic under the GIL), no lock per frame
         self.mutex.lock()
         self.mode = mode
+        self._cached_results = ([], []) # Boxes from the previous screen are meaningless now
         self.mutex.unlock()
 
     def get_mode(self):
-        self.mutex.lock()
-        m = self.mode
-        self.mutex.unlock()
-        return m
+        return self.mode
 
     def run(self):
-        if self.recognizer is None:
-            self.recognizer = FaceRecognizer()
+        # Keep camera cadence steady: pin this thread to cores 2-3 and raise its priority.
+        # Both are Linux/permission dependent (nice < 0 needs CAP_SYS_NICE) - best effort.
+        # Pair with isolcpus=2,3 in /boot/cmdline.txt on the Pi.
+        pin_current_thread(VIDEO_CORES)
+        # OpenCV's parallel_for_ pool is process-wide; size it to one core pair
+        cv2.setNumThreads(2)
+        try:
+            os.nice(-5)
+        except (AttributeError, OSError):
+            pass
 
-        # Camera Setup
+        # Camera Setup - models load later, on the first frame that needs them
         cap = None
         picam2 = None
         use_picamera2 = False
+        has_lores = False # picamera2 lores stream configured
+        # Backend/size that worked last boot - lets us skip a picamera2 probe that is
+        # known to fail (slow on USB-camera setups) and request the right size directly
+        cam_cache = load_camera_cache()
+        frame_w, frame_h = cam_cache.get("frame_size", (640, 480))
         
-        if PICAMERA2_AVAILABLE:
+        if PICAMERA2_AVAILABLE and cam_cache.get("backend") != "V4L2":
             try:
                 picam2 = Picamera2()
-                config = picam2.create_preview_configuration(main={"size": (640, 480), "format": "RGB888"})
-                picam2.configure(config)
+                # libcamera "RGB888" is B,G,R byte order - i.e. already OpenCV BGR, like V4L2.
+                # 3-channel (not XBGR8888) so detection/crops/Qt all take the frame as-is;
+                # 4 buffers keep the ISP queue full while we process
+                main_cfg = {"size": (640, 480), "format": "RGB888"}
+                try:
+                    # ISP also outputs a recognition-sized YUV420 stream; its Y plane is the
+                    # downscaled gray frame the detector wants, with no CPU pass at all
+                    config = picam2.create_preview_configuration(
+                        main=main_cfg, lores={"size": RECOGNITION_DETECT_SIZE, "format": "YUV420"}, buffer_count=4)
+                    picam2.configure(config)
+                    has_lores = True
+                except Exception:
+                    config = picam2.create_preview_configuration(main=main_cfg, buffer_count=4)
+                    picam2.configure(config)
+                    has_lores = False
                 picam2.start()
                 picam2.set_controls({"AeEnable": True, "AwbEnable": True})
                 use_picamera2 = True
@@ -196,101 +554,319 @@ class VideoThread(QThread):
                 use_picamera2 = False
         
         if not use_picamera2:
-            cap = cv2.VideoCapture(0) # Default
+            # V4L2 on the Pi/Linux so the format request below is honoured by the driver
+            if sys.platform.startswith("linux"):
+                cap = cv2.VideoCapture(0, cv2.CAP_V4L2)
+            else:
+                cap = cv2.VideoCapture(0) # Default
             if not cap.isOpened():
+                # Hardware changed? Forget the cache so the next start probes everything
+                save_camera_cache({})
                 return 
+            # Ask for MJPG at the working resolution: the camera compresses on-board instead of
+            # streaming YUYV that OpenCV has to convert, and BUFFERSIZE=1 avoids stale frames.
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_w)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_h)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Camera backend is fixed from here on - one specialized loop per backend
+        if use_picamera2:
+            self._run_picam(picam2, has_lores, cam_cache)
+        else:
+            self._run_cv2(cap, cam_cache)
 
-        last_name = None
-        consecutive = 0
+        # Cleanup - finish pending capture writes first
+        self._io_queue.join()
+        if use_picamera2: picam2.stop()
+        elif cap: cap.release()
+
+    def _run_picam(self, picam2, has_lores, cam_cache):
         frame_count = 0
-        
+        cache_checked = False # First decoded frame records the working camera setup
+
         while self._run_flag:
-            current_mode = self.get_mode()
+            self._swap_pending()
+            current_mode = self.mode # Plain read - set_mode only rebinds it
             frame_count += 1
+            if not self._needs_decode(current_mode, frame_count):
+                self.msleep(40)
+                continue
 
-            if use_picamera2:
-                cv_img = picam2.capture_array()
-            else:
-                ret, cv_img = cap.read()
-                if not ret: continue
-            
-            # Processing - OPTIMIZATION: Process recognition every 3rd frame (approx 8-10 FPS)
-            # This drastically reduces CPU load without affecting user experience.
-            if current_mode == "RECOGNITION" and frame_count % 3 == 0:
-                self.process_recognition(cv_img, last_name, consecutive)
-            elif current_mode == "CAPTURE":
-                # Capture mode needs higher FPS for smooth UI feedback
-                self.process_capture(cv_img)
-            
-            # Convert to Qt
-            # Fix Color Issue: Ensure input is treated as BGR and converted to RGB
-            if use_picamera2:
-                 rgb_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-            else:
-                 rgb_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
+            lores_gray = None
+            # Copy the frame out and hand the buffer straight back to libcamera
+            request = picam2.capture_request()
+            try:
+                cv_img = request.make_array("main")
+                if has_lores and current_mode is Mode.RECOGNITION and frame_count % RECOGNITION_STRIDE == 0:
+                    det_w, det_h = RECOGNITION_DETECT_SIZE
+                    lores_gray = request.make_array("lores")[:det_h, :det_w] # Y plane
+            finally:
+                request.release()
+
+            if not cache_checked:
+                cache_checked = True
+                self._remember_camera(cv_img, "PICAMERA2", cam_cache)
+            self._process_frame(cv_img, current_mode, frame_count, lores_gray)
+            self._emit_frame(cv_img)
 
-            h, w, ch = rgb_img.shape
-            bytes_per_line = ch * w
-            # Copy is CRITICAL for thread safety with numpy data
-            qt_img = QImage(rgb_img.data, w, h, bytes_per_line, QImage.Format_RGB888).copy()
-            self.change_pixmap_signal.emit(qt_img)
-            
             # Important: Prevent CPU starvation (40ms = 25 FPS target)
             self.msleep(40)
 
-        # Cleanup
-        if use_picamera2: picam2.stop()
-        elif cap: cap.release()
+    def _run_cv2(self, cap, cam_cache):
+        frame_count = 0
+        frame_period = 1.0 / 30
+        overran = False # Previous iteration's processing took longer than a frame
+        cache_checked = False
 
-    def process_recognition(self, img, last_name, consecutive):
+        while self._run_flag:
+            self._swap_pending()
+            current_mode = self.mode
+            frame_count += 1
+            if not self._needs_decode(current_mode, frame_count):
+                # Just keep the V4L2 queue fresh (grab, no decode)
+                cap.grab()
+                self.msleep(40)
+                continue
+
+            if not cap.grab(): continue
+            if overran:
+                # Latest frame wins: frames queued while we were busy are stale - keep
+                # grabbing (no decode) for up to half a frame period, then decode the newest
+                t_start = time.perf_counter()
+                while time.perf_counter() - t_start < frame_period / 2 and cap.grab():
+                    pass
+            ret, cv_img = cap.retrieve()
+            if not ret: continue
+            t_frame = time.perf_counter()
+
+            if not cache_checked:
+                cache_checked = True
+                self._remember_camera(cv_img, "V4L2", cam_cache)
+            self._process_frame(cv_img, current_mode, frame_count)
+            self._emit_frame(cv_img)
+            overran = (time.perf_counter() - t_frame) > frame_period
+
+            # Important: Prevent CPU starvation (40ms = 25 FPS target)
+            self.msleep(40)
+
+    def _ensure_recognizer(self):
+        """Build the FaceRecognizer on first use - boot straight to register/settings skips the model load."""
         if self.recognizer is None:
+            self.recognizer = FaceRecognizer()
+        return self.recognizer
+
+    def _swap_pending(self):
+        """Swap in a freshly built recognizer / database between frames, never mid-frame."""
+        if self._pending_recognizer is not None or self._pending_db is not None:
+            with self._rec_lock:
+                if self._pending_recognizer is not None:
+                    self.recognizer, self._pending_recognizer = self._pending_recognizer, None
+                if self._pending_db is not None:
+                    self.recognizer.set_database(*self._pending_db)
+                    self._pending_db = None
+
+    def _needs_decode(self, current_mode, frame_count):
+        """Decode only the frames something will look at: every capture frame, every
+        recognition frame, and a reduced preview cadence otherwise."""
+        if current_mode is Mode.IDLE:
+            return self._emit_enabled and frame_count % IDLE_STRIDE == 0
+        if current_mode is Mode.RECOGNITION:
+            return (frame_count % RECOGNITION_STRIDE == 0 or
+                    (self._emit_enabled and frame_count % PREVIEW_STRIDE == 0))
+        return True
+
+    @staticmethod
+    def _remember_camera(cv_img, backend, cam_cache):
+        h, w = cv_img.shape[:2]
+        working = {"backend": backend, "frame_size": [w, h]}
+        if working != cam_cache:
+            save_camera_cache(working)
+
+    def _process_frame(self, cv_img, current_mode, frame_count, lores_gray=None):
+        # Processing - OPTIMIZATION: Process recognition every RECOGNITION_STRIDE frames
+        # (approx 8-10 FPS). This drastically reduces CPU load without affecting user experience.
+        if current_mode is Mode.RECOGNITION:
+            if frame_count % RECOGNITION_STRIDE == 0:
+                self.process_recognition(cv_img, small_gray=lores_gray)
+            else:
+                # Faces move a few pixels between frames - redraw the cached boxes
+                self.draw_faces(cv_img, *self._cached_results)
+        elif current_mode is Mode.CAPTURE:
+            # Capture mode needs higher FPS for smooth UI feedback
+            self.process_capture(cv_img)
+
+    def _emit_frame(self, cv_img):
+        # Convert to Qt - zero-copy: the QImage is a view of the frame buffer.
+        # Only one frame is in flight: a new one is emitted once the GUI has turned
+        # the previous one into a pixmap (release_frame), otherwise this one is dropped.
+        # _last_frame keeps the viewed buffer alive until then.
+        if not (self._emit_enabled and self._frame_released.is_set()):
             return
+        self._frame_released.clear()
+        if HAS_QIMAGE_BGR888:
+            # Qt 5.14+ reads BGR directly - no cvtColor pass/allocation per frame.
+            # strides[0] (not ch*w) so padded frames still map correctly.
+            frame = cv_img
+            fmt = QImage.Format_BGR888
+        else:
+            if self._rgb_buf is None or self._rgb_buf.shape != cv_img.shape:
+                self._rgb_buf = np.empty_like(cv_img)
+            frame = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+            fmt = QImage.Format_RGB888
+        # Scale once here, off the GUI thread, to the label currently showing video
+        # (stretched). Into a reused buffer, so no new image gets allocated per frame
+        target_size = self._target_size
+        if target_size is not None and target_size != (frame.shape[1], frame.shape[0]):
+            tw, th = target_size
+            if self._scaled_buf is None or self._scaled_buf.shape[:2] != (th, tw):
+                self._scaled_buf = np.empty((th, tw, 3), dtype=np.uint8)
+            frame = cv2.resize(frame, target_size, dst=self._scaled_buf,
+                               interpolation=cv2.INTER_LINEAR)
+        if frame.strides[1] != 3:
+            frame = np.ascontiguousarray(frame)
+        self._last_frame = frame
+        h, w, _ = frame.shape
+        qt_img = QImage(frame.data, w, h, frame.strides[0], fmt)
+        self.change_pixmap_signal.emit(qt_img)
+
+    def set_emit(self, on):
+        """Enable/disable sending frames to the GUI (off when no video label is visible)."""
+        self._emit_enabled = on
+
+    def set_cooldown(self, seconds):
+        """Detection only (no embeddings / MATCH emits) for the next `seconds`."""
+        self._cooldown_until = time.monotonic() + seconds
+
+    def set_target_size(self, w, h):
+        """Size of the label frames are shown in; frames are emitted pre-scaled to it."""
+        if w > 0 and h > 0:
+            self._target_size = (w, h)
+
+    def release_frame(self):
+        """Called by the GUI once it no longer needs the last emitted QImage."""
+        self._frame_released.set()
+
+    def process_recognition(self, img, small_gray=None):
+        """small_gray: optional RECOGNITION_DETECT_SIZE luma frame (picamera2 lores stream)."""
+        self._ensure_recognizer()
         
         # Guard against mode change mid-processing
-        if self.get_mode() != "RECOGNITION":
+        if self.mode is not Mode.RECOGNITION:
             return
 
+        # Detector only needs luma: one gray pass, downscaled, then expanded back to 3 channels
+        # (YuNet input) in reused buffers. The colour frame is still used for the embeddings.
+        det_w, det_h = RECOGNITION_DETECT_SIZE
+        if small_gray is None:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            if self._small_gray_buf is None:
+                self._small_gray_buf = np.empty((det_h, det_w), dtype=np.uint8)
+            small_gray = cv2.resize(gray, (det_w, det_h), dst=self._small_gray_buf, interpolation=cv2.INTER_AREA)
+
+        # Empty room: a few-ms cascade on the small frame lets us skip the CNN entirely
+        if self._face_prefilter is not None:
+            if len(self._face_prefilter.detectMultiScale(small_gray, 1.2, 3)) == 0:
+                self._cached_results = ([], [])
+                return
+
+        if self._det_buf is None:
+            self._det_buf = np.empty((det_h, det_w, 3), dtype=np.uint8)
+        cv2.cvtColor(small_gray, cv2.COLOR_GRAY2BGR, dst=self._det_buf)
+
+        cooling = time.monotonic() < self._cooldown_until
         try:
-            locations, names = self.recognizer.recognize_faces(img)
+            faces = self.recognizer.detect(img, detect_frame=self._det_buf)
+            if faces is None or len(faces) == 0:
+                locations, names = [], []
+            else:
+                locations = self.recognizer.face_locations(faces)
+                # Temporal cache: a known face that barely moved keeps its name, so only
+                # new/unknown faces are embedded - everyone is re-verified periodically
+                self._recognition_pass += 1
+                if self._recognition_pass % REVERIFY_EVERY == 0:
+                    names = [None] * len(locations)
+                else:
+                    names = self._carry_over_names(locations)
+                # During the welcome cooldown nothing is embedded at all
+                todo = [] if cooling else [i for i, n in enumerate(names) if n is None]
+                if todo:
+                    for i, name in zip(todo, self.recognizer.identify(img, faces[todo])):
+                        names[i] = name
+                names = [n or "Unknown" for n in names]
         except Exception as e:
             print(f"Recognition error: {e}")
+            self._cached_results = ([], [])
             return
-        
-        for (x, y, w, h), name in zip(locations, names):
-            color = (0, 255, 0) if name != "Unknown" else (0, 0, 255)
-            l_len = 20
-            t = 2
-            # Minimal Corners
-            cv2.line(img, (x, y), (x + l_len, y), color, t)
-            cv2.line(img, (x, y), (x, y + l_len), color, t)
-            cv2.line(img, (x+w, y), (x+w - l_len, y), color, t)
-            cv2.line(img, (x+w, y), (x+w, y + l_len), color, t)
-            cv2.line(img, (x, y+h), (x + l_len, y+h), color, t)
-            cv2.line(img, (x, y+h), (x, y+h - l_len), color, t)
-            cv2.line(img, (x+w, y+h), (x+w - l_len, y+h), color, t)
-            cv2.line(img, (x+w, y+h), (x+w, y+h - l_len), color, t)
-
-            if name != "Unknown":
+
+        self._cached_results = (locations, names)
+        self.draw_faces(img, locations, names)
+
+        if cooling:
+            return
+        # Same person stays in view for many passes - don't queue a signal for each one
+        now = time.monotonic()
+        for name in names:
+            if name != "Unknown" and now - self._last_emitted.get(name, float('-inf')) > MATCH_EMIT_INTERVAL:
+                self._last_emitted[name] = now
                 self.attendance_signal.emit(f"MATCH:{name}")
 
+    def _carry_over_names(self, locations):
+        """Known name of the previous pass's box each new box overlaps (IoU > SAME_FACE_IOU), else None."""
+        prev_locations, prev_names = self._cached_results
+        names = [None] * len(locations)
+        if len(prev_locations) == 0:
+            return names
+        iou = box_iou(np.asarray(locations), np.asarray(prev_locations))
+        best = iou.argmax(axis=1)
+        for i, j in enumerate(best):
+            if iou[i, j] > SAME_FACE_IOU and prev_names[j] != "Unknown":
+                names[i] = prev_names[j]
+        return names
+
+    def draw_faces(self, img, locations, names):
+        if len(locations) == 0:
+            return
+        l_len = 20
+        t = 2
+        # Minimal Corners - all 4 L-shaped corners of every face computed in one numpy pass,
+        # then drawn with a single cv2.polylines call per colour (known / unknown)
+        boxes = np.asarray(locations, dtype=np.int32)                       # (N, 4) x, y, w, h
+        anchors = boxes[:, None, :2] + boxes[:, None, 2:] * CORNER_ANCHORS  # (N, 4, 2)
+        corners = anchors[:, :, None, :] + CORNER_STROKES * l_len           # (N, 4, 3, 2)
+        known = np.array([name != "Unknown" for name in names])
+        for mask, color in ((known, (0, 255, 0)), (~known, (0, 0, 255))):
+            if mask.any():
+                cv2.polylines(img, corners[mask].reshape(-1, 3, 2), False, color, t)
+
     def process_capture(self, img):
-        if self.recognizer is None or self.recognizer.detector is None:
+        if self._ensure_recognizer().detector is None:
             return
             
         try:
             h, w, _ = img.shape
-            self.recognizer.detector.setInputSize((w, h))
-            _, faces = self.recognizer.detector.detect(img)
+            # Detect on a 320x240 copy (~4x fewer detector FLOPs) and scale boxes back up;
+            # the crop below still comes from the full-res frame so training images stay sharp
+            det_w, det_h = CAPTURE_DETECT_SIZE
+            if self._small_buf is None or self._small_buf.shape != (det_h, det_w, img.shape[2]):
+                self._small_buf = np.empty((det_h, det_w, img.shape[2]), dtype=img.dtype)
+            small = cv2.resize(img, (det_w, det_h), dst=self._small_buf)
+            box_scale = np.array([w / det_w, h / det_h, w / det_w, h / det_h], dtype=np.float32)
+            # Reconfigures the DNN only when the input size actually changes
+            self.recognizer.set_input_size((det_w, det_h))
+            _, faces = self.recognizer.detector.detect(small)
             
             if faces is not None:
-                for face in faces:
-                   box = face[:4].astype(int)
-                   x, y, w_box, h_box = box[0], box[1], box[2], box[3]
-                   
-                   center_x, center_y = x + w_box//2, y + h_box//2
-                   radius = int(min(w_box, h_box) / 1.5)
-                   # Draw guide
-                   cv2.circle(img, (center_x, center_y), radius, (255, 255, 0), 2)
+                # All boxes and their margin-padded, frame-clipped crop rects in one pass
+                margin = 20
+                boxes = (faces[:, :4] * box_scale).astype(np.int32)                  # x, y, w, h
+                crop_rects = np.clip(np.hstack((boxes[:, :2] - margin,
+                                                boxes[:, :2] + boxes[:, 2:] + margin)),
+                                     0, np.array([w, h, w, h], dtype=np.int32))       # x1, y1, x2, y2
+                guides = [] # Guide circles, drawn after all crops are taken so none ends up in one
+                for box, (x1, y1, x2, y2) in zip(boxes, crop_rects):
+                   x, y, w_box, h_box = box
                    
                    if self.capture_count < self.capture_target:
                        self.capture_count += 1
@@ -299,53 +875,116 @@ class VideoThread(QThread):
                        if not self.capture_dir or not os.path.exists(self.capture_dir):
                            # Fallback or error - but don't crash
                            print(f"Error: Capture directory missing: {self.capture_dir}")
-                           self.mode = "IDLE" 
+                           self.mode = Mode.IDLE
                            return
 
-                       filename = f"{self.capture_dir}/{self.capture_count}.jpg"
-                       margin = 20
-                       x1 = max(0, x - margin)
-                       y1 = max(0, y - margin)
-                       x2 = min(w, x + w_box + margin)
-                       y2 = min(h, y + h_box + margin)
+                       filename = os.path.join(self.capture_dir, f"{self.capture_count}.ppm")
                        crop = img[y1:y2, x1:x2]
                        
                        # Validate crop
                        if crop.size == 0: continue
 
-                       save_img = cv2.cvtColor(crop, cv2.COLOR_RGB2BGR) if PICAMERA2_AVAILABLE else crop
-                       cv2.imwrite(filename, save_img)
+                       # Own copy: the frame buffer is drawn on / reused after this. Frames are
+                       # BGR on both camera paths, so no channel swap is needed.
+                       # Kept in memory so training doesn't have to decode it again, and
+                       # written by the IO worker so SD-card latency never stalls the loop.
+                       save_img = crop.copy()
+                       self.captured_crops[filename] = save_img
+                       self._io_queue.put((filename, save_img))
                        
                        progress = int((self.capture_count / self.capture_target) * 100)
                        self.capture_progress_signal.emit(progress)
+                       guides.append(((x + w_box//2, y + h_box//2), int(min(w_box, h_box) / 1.5)))
                    else:
-                       self.mode = "IDLE"
+                       self.mode = Mode.IDLE
+                       # All crops on disk before training / the processed log see this user
+                       self._io_queue.join()
                        self.attendance_signal.emit("CAPTURE_COMPLETE")
                        break
+
+                # Draw guide - only around faces this frame actually captured
+                for center, radius in guides:
+                    cv2.circle(img, center, radius, (255, 255, 0), 2)
         except Exception as e:
             print(f"Capture Error: {e}")
-            self.mode = "IDLE" # Reset to safe state
+            self.mode = Mode.IDLE # Reset to safe state
 
     def start_capture(self, user_id, user_name):
         self.capture_dir = os.path.join(KNOWN_FACES_DIR, f"{user_id}_{user_name}")
-        if not os.path.exists(self.capture_dir):
-            os.makedirs(self.capture_dir)
+        os.makedirs(self.capture_dir, exist_ok=True)
         self.capture_count = 0
-        self.mode = "CAPTURE"
+        self.captured_crops = {}
+        self.mode = Mode.CAPTURE
+
+    def take_captured_crops(self):
+        """Return the crops of the last capture ({filename: image}) and forget them."""
+        crops, self.captured_crops = self.captured_crops, {}
+        return crops
 
     def stop(self):
         self._run_flag = False
         self.wait()
     
     def reload_model(self):
-        self.recognizer = FaceRecognizer()
+        # Only the embeddings changed after a retrain: read them here (caller's thread,
+        # outside the lock) and keep YuNet/MobileFaceNet loaded. The video loop swaps them
+        # in on its next frame; self.recognizer itself is only ever touched by run().
+        rec = self.recognizer
+        if rec is None:
+            return # Not built yet - it reads the new files itself on first use
+        if rec.detector is None or rec.recognizer is None:
+            # Models failed to load earlier - worth a full rebuild
+            new_rec = FaceRecognizer()
+            with self._rec_lock:
+                self._pending_recognizer = new_rec
+            return
+        db = rec.read_database()
+        with self._rec_lock:
+            self._pending_db = db
 
 class TrainThread(QThread):
     finished_signal = pyqtSignal(bool, str)
+
+    def __init__(self, encoder=None):
+        super().__init__()
+        # Incremental jobs, in order: ("add", user_dir, preloaded crops) / ("remove", user, None).
+        # Queued from the GUI thread, drained by run(); an empty queue means a full process_images() scan
+        self.pending = queue.Queue()
+        self.encoder = encoder # Kept across runs so the ONNX models are only parsed once
+        self._stop_event = threading.Event() # Checked by the encoder per image / batch
+        self.finished.connect(self._start_pending)
+
+    def add_job(self, kind, target, preloaded=None):
+        """Queue an incremental update and start a retrain unless one is running
+        (jobs queued in the meantime are picked up by _start_pending on finished)."""
+        self.pending.put((kind, target, preloaded))
+        if not self.isRunning():
+            self.start()
+
     def run(self):
+        jobs = []
+        while True:
+            try:
+                jobs.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        pin_current_thread(TRAIN_CORES) # Keep retraining off the video cores
         try:
-            encoder = FaceEncoder()
-            success = encoder.process_images()
+            if self.encoder is None or self.encoder.detector is None:
+                self.encoder = FaceEncoder()
+            else:
+                # Disk stays the source of truth (scripts may retrain too)
+                self.encoder._load_existing_data()
+            self.encoder.stop_event = self._stop_event
+            if jobs:
+                success = True
+                for kind, target, preloaded in jobs:
+                    if kind == "remove":
+                        success = self.encoder.remove_user(target) and success
+                    else:
+                        success = self.encoder.add_user(target, preloaded=preloaded) and success
+            else:
+                success = self.encoder.process_images()
             if success:
                 self.finished_signal.emit(True, "Success")
             else:
@@ -353,6 +992,19 @@ class TrainThread(QThread):
         except Exception as e:
             self.finished_signal.emit(False, str(e))
 
+    def _start_pending(self):
+        # Connected to finished, i.e. run() has really returned - unlike finished_signal,
+        # which can be handled while isRunning() is still True and add_job skips start()
+        if not self.pending.empty() and not self._stop_event.is_set():
+            self.start()
+
+    def stop(self, timeout_ms=TRAIN_STOP_TIMEOUT_MS):
+        # No event loop here, so quit() would do nothing: ask the encoder to wrap up
+        # after its current image (it still saves what it has), then wait for it.
+        self._stop_event.set()
+        if not self.wait(timeout_ms):
+            print(f"[WARN] Retrain still running after {timeout_ms} ms - exiting without it")
+
 
 class MQTTWorker(QThread):
     """Background thread that subscribes to receive-users and auto-updates the HMI employee list."""
@@ -386,7 +1038,7 @@ class MQTTWorker(QThread):
 
         def on_message(c, userdata, msg):
             try:
-                payload = json.loads(msg.payload.decode("utf-8"))
+                payload = json_loads(msg.payload)
                 # Dashboard may send: [...] or {"users": [...]}
                 if isinstance(payload, dict) and "users" in payload:
                     payload = payload["users"]   # unwrap
@@ -394,13 +1046,13 @@ class MQTTWorker(QThread):
                     payload = [payload]           # single user dict
                 if not isinstance(payload, list):
                     return
-                # Extract only what the CM4 needs
-                stripped = [
-                    {"user_id": str(u.get("user_id") or u.get("id", "")),
-                     "name":    str(u.get("name")    or u.get("employee_name", ""))}
-                    for u in payload
-                    if (u.get("user_id") or u.get("id")) and (u.get("name") or u.get("employee_name"))
-                ]
+                # Extract only what the CM4 needs - one lookup per field per user
+                stripped = []
+                for u in payload:
+                    uid = u.get("user_id") or u.get("id")
+                    nm = u.get("name") or u.get("employee_name")
+                    if uid and nm:
+                        stripped.append({"user_id": str(uid), "name": str(nm)})
                 if stripped:
                     self.db.upsert_users(stripped)
                     self.users_updated.emit()   # Tell HMI to refresh
@@ -426,6 +1078,49 @@ class MQTTWorker(QThread):
         self._stop_flag = True
 
 # --- MAIN APP ---
+class RmTreeSignals(QObject):
+    done = pyqtSignal(str, bool, str) # user_dir, success, error message
+
+class RmTreeTask(QRunnable):
+    """Delete a user's face folder on the global thread pool - thousands of unlink()s."""
+    def __init__(self, user_dir):
+        super().__init__()
+        self.user_dir = user_dir
+        self.signals = RmTreeSignals()
+
+    def run(self):
+        try:
+            shutil.rmtree(os.path.join(KNOWN_FACES_DIR, self.user_dir))
+            self.signals.done.emit(self.user_dir, True, "")
+        except Exception as e:
+            self.signals.done.emit(self.user_dir, False, str(e))
+
+class NetStatusWorker(QThread):
+    """One network probe per start(); the result goes back to the GUI as (ip, icon, color)."""
+    status_ready = pyqtSignal(str, str, str)
+
+    def run(self):
+        # Simple check - an interface with an address counts as connected
+        ip = local_ip()
+        if ip is None:
+            self.status_ready.emit("Disconnected", "❌", "#f38ba8")
+            return
+        # Connected - the wifi guess only picks the icon, it can't mark us offline
+        icon = "📶" if self._probe_wifi() else "🔌" # WiFi / LAN
+        self.status_ready.emit(ip, icon, "#a6e3a1") # Green
+
+    @staticmethod
+    def _probe_wifi():
+        """
+        Simple Heuristic for Icon (Linux specific mostly): a wlan entry in
+        /proc/net/wireless. On Windows, hard to tell without psutil - LAN icon then.
+        """
+        try:
+            with open("/proc/net/wireless", "r") as f:
+                return "wlan" in f.read()
+        except OSError:
+            return False
+
 class MainApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -434,45 +1129,74 @@ class MainApp(QMainWindow):
         self.setStyleSheet(STYLE_MAIN)
         
         self.db = LocalDatabase()
+        # Punches are buffered and written in one transaction per second (or every 16)
+        self._pending_punches = []
+        self._punch_timer = QTimer(self)
+        self._punch_timer.timeout.connect(self.flush_attendance)
+        self._punch_timer.start(1000)
+
+        # Registered face folders, cached between list refreshes; the watcher (inotify on
+        # the Pi) drops the cache whenever a folder is added to / removed from KNOWN_FACES_DIR
+        self._user_dirs_cache = None
+        os.makedirs(KNOWN_FACES_DIR, exist_ok=True) # Can only watch an existing directory
+        self._fs_watcher = QFileSystemWatcher([KNOWN_FACES_DIR], self)
+        self._fs_watcher.directoryChanged.connect(self._invalidate_user_dirs)
         
         self.central_widget = QStackedWidget()
         self.setCentralWidget(self.central_widget)
         
-        # CRITICAL: Initialize ALL screens BEFORE starting video thread
+        # CRITICAL: Initialize the video screens BEFORE starting video thread
         # This prevents segfaults from thread trying to update non-existent widgets
-        self.init_home_screen()
-        self.init_settings_screen()
-        self.init_register_screen()
-        self.init_delete_screen()
-        self.init_about_screen()
-        
-        # New Screens
-        self.init_user_view_screen() # 5
-        self.init_user_mgt_menu()    # 6
-        self.init_shift_screen()     # 7
-        self.init_comm_set_menu()    # 8
-        self.init_comm_params_screen() # 9
-        self.init_ethernet_screen()  # 10
-        self.init_wifi_screen()      # 11
-        
-        self.init_employee_list_screen() # 12
+        self.init_home_screen()      # 0
+        self.init_settings_screen()  # 1
+        self.init_register_screen()  # 2
+
+        # The rest are built the first time they are opened (_ensure_screen); until then an
+        # empty placeholder holds their index so the numbering below stays fixed
+        self._screen_builders = {
+            3: self.init_delete_screen,
+            4: self.init_about_screen,
+            5: self.init_user_view_screen,
+            6: self.init_user_mgt_menu,
+            7: self.init_shift_screen,
+            8: self.init_comm_set_menu,
+            9: self.init_comm_params_screen,
+            10: self.init_ethernet_screen,
+            11: self.init_wifi_screen,
+            12: self.init_employee_list_screen,
+        }
+        self._built_screens = set()
+        for _ in self._screen_builders:
+            self.central_widget.addWidget(QWidget())
         
         # NOW start the video thread after all widgets exist
+        self._video_pixmap = QPixmap() # Persistent target for update_video_feed
         self.thread = VideoThread()
+        self._pending_mode = None
+        self._mode_timer = QTimer(self) # Debounces switch_screen -> thread.set_mode
+        self._mode_timer.setSingleShot(True)
+        self._mode_timer.setInterval(150)
+        self._mode_timer.timeout.connect(self._apply_pending_mode)
         self.thread.change_pixmap_signal.connect(self.update_video_feed)
         self.thread.attendance_signal.connect(self.handle_video_signal)
         self.thread.capture_progress_signal.connect(self.update_capture_progress)
         self.thread.start()
+        # Only ship frames while a video label is actually on screen
+        self.central_widget.currentChanged.connect(self.update_video_emit)
 
         self.train_thread = TrainThread()
         self.train_thread.finished_signal.connect(self.on_training_complete)
+        if os.path.exists(EMBEDDINGS_FILE) and stored_embedding_precision() != embedding_precision():
+            # MODEL_PRECISION changed since the gallery was built - re-encode everyone in the background
+            print(f"[INFO] Embeddings built at {stored_embedding_precision()}, model is {embedding_precision()} - re-encoding")
+            self.train_thread.start()
 
         # MQTT worker — listens on receive-users and auto-refreshes employee list
         self.mqtt_worker = MQTTWorker()
         self.mqtt_worker.users_updated.connect(self.refresh_employee_list)
         self.mqtt_worker.start()
 
-        self.last_recognized_time = 0
+        self.last_recognized_time = float('-inf') # time.monotonic() of the last welcome
         
     def init_home_screen(self):
         self.home_widget = QWidget()
@@ -508,11 +1232,11 @@ class MainApp(QMainWindow):
         
         time_top_layout = QHBoxLayout()
         self.lbl_date_overlay = QLabel("2024-01-01")
-        self.lbl_date_overlay.setFont(QFont("Segoe UI", 9))
+        self.lbl_date_overlay.setFont(ui_font(9))
         self.lbl_date_overlay.setStyleSheet("color: #b4befe; font-weight: bold;")
         
         self.lbl_day_overlay = QLabel("MON")
-        self.lbl_day_overlay.setFont(QFont("Segoe UI", 9, QFont.Bold))
+        self.lbl_day_overlay.setFont(ui_font(9, bold=True))
         self.lbl_day_overlay.setStyleSheet("color: #fab387;")
         self.lbl_day_overlay.setAlignment(Qt.AlignRight)
         
@@ -521,7 +1245,7 @@ class MainApp(QMainWindow):
         time_top_layout.addWidget(self.lbl_day_overlay)
         
         self.lbl_time_overlay = QLabel("12:00:00")
-        self.lbl_time_overlay.setFont(QFont("Segoe UI", 24, QFont.Bold))
+        self.lbl_time_overlay.setFont(ui_font(24, bold=True))
         self.lbl_time_overlay.setStyleSheet("color: white;")
         self.lbl_time_overlay.setAlignment(Qt.AlignCenter)
         
@@ -546,10 +1270,10 @@ class MainApp(QMainWindow):
         net_layout.setContentsMargins(5, 2, 5, 2)
         
         self.lbl_net_icon = QLabel("🔌") # Default LAN
-        self.lbl_net_icon.setFont(QFont("Segoe UI", 12))
+        self.lbl_net_icon.setFont(ui_font(12))
         
         self.lbl_net_ip = QLabel("127.0.0.1")
-        self.lbl_net_ip.setFont(QFont("Segoe UI", 10, QFont.Bold))
+        self.lbl_net_ip.setFont(ui_font(10, bold=True))
         self.lbl_net_ip.setStyleSheet("color: #a6e3a1;")
         
         net_layout.addWidget(self.lbl_net_icon)
@@ -584,10 +1308,25 @@ class MainApp(QMainWindow):
         self.overlay.move(120, 300) # Centered roughly
         
         # Setup Timer for Clock & Network Check
+        # The clock is ticked by update_video_feed (home shows video ~25x/s anyway);
+        # this 1 Hz timer only redraws it when frames stop (no camera, stalled pipeline)
         self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_home_ui)
+        self.timer.timeout.connect(self._clock_fallback)
         self.timer.start(1000)
+        self._last_clock_tick = float('-inf') # time.monotonic() of the last update_home_ui
+        self._clock_day = None # Date the cached date/day labels were rendered for
+        self._last_time_str = None # Text currently in lbl_time_overlay
         self.update_home_ui()
+
+        # Network status has its own slow timer - the socket probe stays off the clock path
+        self._net_state = None # (ip, icon, color) currently shown
+        self._last_ip = None
+        self.net_worker = NetStatusWorker()
+        self.net_worker.status_ready.connect(self._apply_net_status)
+        self.net_timer = QTimer(self)
+        self.net_timer.timeout.connect(self.check_network_status)
+        self.net_timer.start(NET_STATUS_INTERVAL_MS)
+        self.check_network_status()
         
         self.central_widget.addWidget(self.home_widget)
 
@@ -620,7 +1359,7 @@ class MainApp(QMainWindow):
         
         lbl_title = QLabel("MENU")
         # Match style of create_top_bar (16px Bold)
-        lbl_title.setFont(QFont("Segoe UI", 16, QFont.Bold))
+        lbl_title.setFont(ui_font(16, bold=True))
         lbl_title.setStyleSheet("color: #cdd6f4; font-size: 16px; font-weight: bold;") 
         lbl_title.setAlignment(Qt.AlignCenter)
         
@@ -645,28 +1384,13 @@ class MainApp(QMainWindow):
         def create_grid_btn(text, icon_emoji, row, col, callback=None):
             btn = QToolButton()
             btn.setText(f"{icon_emoji}\n{text}")
-            btn.setFont(QFont("Segoe UI", 16, QFont.Bold))
+            btn.setFont(ui_font(16, bold=True))
             btn.setToolButtonStyle(Qt.ToolButtonTextUnderIcon)
             btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
             btn.setCursor(Qt.PointingHandCursor)
             
-            # Replicating the blue tile style
-            btn.setStyleSheet("""
-                QToolButton {
-                    background-color: #0078d7; 
-                    color: white;
-                    border: none;
-                    border-radius: 0px; 
-                    padding: 10px;
-                    font-size: 18px;
-                }
-                QToolButton:hover {
-                    background-color: #0063b1;
-                }
-                QToolButton:pressed {
-                    background-color: #005a9e;
-                }
-            """)
+            # Replicating the blue tile style (QToolButton[tile="large"] in STYLE_MAIN)
+            btn.setProperty("tile", "large")
             
             # Using emojis as icons roughly matching the image
             # Ideally we'd use QIcon with actual resource files
@@ -711,7 +1435,7 @@ class MainApp(QMainWindow):
         form_layout.setSpacing(20)
         
         lbl_title = QLabel("New User Registration")
-        lbl_title.setFont(QFont("Segoe UI", 24, QFont.Bold))
+        lbl_title.setFont(ui_font(24, bold=True))
         lbl_title.setStyleSheet("color: #89b4fa;")
         
         self.input_name = QLineEdit()
@@ -748,7 +1472,7 @@ class MainApp(QMainWindow):
         self.video_label_reg = QLabel()
         self.video_label_reg.setFixedSize(480, 640)
         self.video_label_reg.setStyleSheet("background-color: black; border-radius: 20px;")
-        self.video_label_reg.setScaledContents(True)
+        self.video_label_reg.setScaledContents(False) # Frames arrive pre-scaled to the label
 
         layout.addWidget(form_container, stretch=1)
         layout.addWidget(self.video_label_reg)
@@ -781,7 +1505,7 @@ class MainApp(QMainWindow):
         btn_back.clicked.connect(lambda: self.switch_screen(1))
         
         lbl_title = QLabel("Delete User")
-        lbl_title.setFont(QFont("Segoe UI", 36, QFont.Bold))
+        lbl_title.setFont(ui_font(36, bold=True))
         lbl_title.setStyleSheet("color: #f38ba8;")
         
         top_bar_layout.addWidget(btn_back)
@@ -798,27 +1522,31 @@ class MainApp(QMainWindow):
         content_layout.setSpacing(20)
         
         lbl_instruction = QLabel("Select a user to remove from the system")
-        lbl_instruction.setFont(QFont("Segoe UI", 16))
+        lbl_instruction.setFont(ui_font(16))
         lbl_instruction.setStyleSheet("color: #a6adc8;")
         content_layout.addWidget(lbl_instruction)
         
-        self.delete_list = QListWidget()
-        self.delete_list.setFont(QFont("Segoe UI", 18))
+        # Folder names straight from a string model - no item object per row
+        self.delete_model = QStringListModel(self)
+        self.delete_list = QListView()
+        self.delete_list.setModel(self.delete_model)
+        self.delete_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.delete_list.setFont(ui_font(18))
         self.delete_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #313244;
                 border-radius: 15px;
                 padding: 15px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 15px;
                 border-bottom: 1px solid #45475a;
                 border-radius: 8px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #45475a;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #3a3a4a;
             }
         """)
@@ -837,6 +1565,7 @@ class MainApp(QMainWindow):
             QPushButton:hover { background-color: #f5c2e7; }
         """)
         btn_confirm_del.clicked.connect(self.delete_selected_user)
+        self.btn_confirm_del = btn_confirm_del
         content_layout.addWidget(btn_confirm_del)
         
         main_layout.addWidget(content)
@@ -868,7 +1597,7 @@ class MainApp(QMainWindow):
         btn_back.clicked.connect(lambda: self.switch_screen(1))
         
         lbl_title = QLabel("About System")
-        lbl_title.setFont(QFont("Segoe UI", 36, QFont.Bold))
+        lbl_title.setFont(ui_font(36, bold=True))
         lbl_title.setStyleSheet("color: #a6e3a1;")
         
         top_bar_layout.addWidget(btn_back)
@@ -903,90 +1632,94 @@ class MainApp(QMainWindow):
         """Create a professional info display card"""
         card = QFrame()
         card.setFixedHeight(120)
-        card.setStyleSheet(f"""
-            QFrame {{
-                background-color: #313244;
-                border-radius: 15px;
-                border-left: 5px solid {accent_color};
-            }}
-        """)
+        # Styled by the QFrame[card] / [accent] rules in STYLE_MAIN (accents defined there)
+        card.setProperty("card", True)
+        card.setProperty("accent", accent_color)
         
         card_layout = QVBoxLayout(card)
         card_layout.setContentsMargins(30, 20, 30, 20)
         card_layout.setSpacing(10)
         
         lbl_label = QLabel(label)
-        lbl_label.setFont(QFont("Segoe UI", 14))
-        lbl_label.setStyleSheet("color: #a6adc8;")
+        lbl_label.setObjectName("card_label")
+        lbl_label.setFont(ui_font(14))
         
         lbl_value = QLabel(value)
         lbl_value.setObjectName("value_label")
-        lbl_value.setFont(QFont("Segoe UI", 22, QFont.Bold))
-        lbl_value.setStyleSheet(f"color: {accent_color};")
+        lbl_value.setFont(ui_font(22, bold=True))
         
         card_layout.addWidget(lbl_label)
         card_layout.addWidget(lbl_value)
         
         return card
 
+    def _clock_fallback(self):
+        if time.monotonic() - self._last_clock_tick >= CLOCK_STALE_SECS:
+            self.update_home_ui()
+
     def update_home_ui(self):
-        # Update Time
+        self._last_clock_tick = time.monotonic()
+        # Update Time - setText only when the text changed (each one restyles + repaints)
         now = datetime.now()
-        self.lbl_time_overlay.setText(now.strftime("%H:%M:%S"))
-        self.lbl_date_overlay.setText(now.strftime("%Y-%m-%d"))
-        self.lbl_day_overlay.setText(now.strftime("%a").upper())
-        
-        # Update Network (Every 5 seconds roughly or just check quickly)
-        # Optimization: Only check every 5th second
-        if int(now.timestamp()) % 5 == 0:
-            self.check_network_status()
+        time_str = now.strftime("%H:%M:%S")
+        if time_str != self._last_time_str:
+            self._last_time_str = time_str
+            self.lbl_time_overlay.setText(time_str)
+        # Date and day only change at midnight
+        if now.date() != self._clock_day:
+            self._clock_day = now.date()
+            self.lbl_date_overlay.setText(now.strftime("%Y-%m-%d"))
+            self.lbl_day_overlay.setText(now.strftime("%a").upper())
 
     def check_network_status(self):
-        ip = "127.0.0.1"
-        icon = "❌" # Disconnected
-        color = "#f38ba8" 
-        
-        try:
-            # Simple check
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            # Try connecting to Google DNS to get external facing IP
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            
-            # Simple Heuristic for Icon (Linux specific mostly)
-            # On Windows, hard to tell without psutil.
-            # Assuming if IP exists -> Connected.
-            # Default to LAN icon if we can't tell.
-            icon = "🔌" # LAN
-            
-            # Try to guess WiFi based on common interface names if on Linux
-            if os.path.exists("/proc/net/wireless"):
-                with open("/proc/net/wireless", "r") as f:
-                    if "wlan" in f.read():
-                         icon = "📶" # WiFi
-                         
-            color = "#a6e3a1" # Green
-            
-        except:
-            ip = "Disconnected"
-            icon = "❌"
-            color = "#f38ba8"
-
+        # Probe runs on NetStatusWorker - a slow route/connect must not stall the GUI
+        if not self.net_worker.isRunning():
+            self.net_worker.start()
+
+    def _apply_net_status(self, ip, icon, color):
+        self._last_ip = ip # About screen shows this - no probe of its own
+        # Usually unchanged between checks - skip the restyle (setStyleSheet re-polishes)
+        if (ip, icon, color) == self._net_state:
+            return
+        self._net_state = (ip, icon, color)
         self.lbl_net_ip.setText(ip)
         self.lbl_net_icon.setText(icon)
         self.lbl_net_ip.setStyleSheet(f"color: {color};")
 
+    def _ensure_screen(self, index):
+        """Build a lazily created screen and swap it in for its placeholder."""
+        if index not in self._screen_builders or index in self._built_screens:
+            return
+        self._built_screens.add(index)
+        stack = self.central_widget
+        placeholder = stack.widget(index)
+        self._screen_builders[index]() # Each init_* appends its widget at the end
+        widget = stack.widget(stack.count() - 1)
+        stack.removeWidget(widget)
+        stack.removeWidget(placeholder)
+        stack.insertWidget(index, widget)
+        placeholder.deleteLater()
+
     def switch_screen(self, index):
+        self._ensure_screen(index)
         self.central_widget.setCurrentIndex(index)
         if index == 0:
-            self.thread.set_mode("RECOGNITION")
+            self._request_mode(Mode.RECOGNITION)
         elif index == 2:  # Register
-            self.thread.set_mode("IDLE")
+            self._request_mode(Mode.IDLE)
         elif index == 12: # Employee List — always refresh on open
             self.refresh_employee_list()
         else:
-            self.thread.set_mode("IDLE")
+            self._request_mode(Mode.IDLE)
+
+    def _request_mode(self, mode):
+        # Tapping through menus only changes the video mode once navigation settles
+        self._pending_mode = mode
+        self._mode_timer.start()
+
+    def _apply_pending_mode(self):
+        if self._pending_mode is not self.thread.mode:
+            self.thread.set_mode(self._pending_mode)
 
     # --- NEW MENUS ---
     def init_user_mgt_menu(self):
@@ -1017,10 +1750,13 @@ class MainApp(QMainWindow):
         
         layout.addWidget(self.create_top_bar("User List", lambda: self.switch_screen(6)))
         
-        self.user_list_view = QListWidget()
+        self.user_list_model = QStringListModel(self)
+        self.user_list_view = QListView()
+        self.user_list_view.setModel(self.user_list_model)
+        self.user_list_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.user_list_view.setStyleSheet("""
-            QListWidget { background-color: #313244; border-radius: 10px; padding: 10px; font-size: 18px; }
-            QListWidget::item { padding: 10px; border-bottom: 1px solid #45475a; }
+            QListView { background-color: #313244; border-radius: 10px; padding: 10px; font-size: 18px; }
+            QListView::item { padding: 10px; border-bottom: 1px solid #45475a; }
         """)
         layout.addWidget(self.user_list_view)
         
@@ -1038,11 +1774,11 @@ class MainApp(QMainWindow):
         form_layout.setSpacing(30)
         
         lbl_start = QLabel("Shift Start Time:")
-        lbl_start.setFont(QFont("Segoe UI", 18))
+        lbl_start.setFont(ui_font(18))
         self.input_shift_start = QLineEdit("09:00")
         
         lbl_end = QLabel("Shift End Time:")
-        lbl_end.setFont(QFont("Segoe UI", 18))
+        lbl_end.setFont(ui_font(18))
         self.input_shift_end = QLineEdit("18:00")
         
         btn_save = QPushButton("Save Shift")
@@ -1110,7 +1846,7 @@ class MainApp(QMainWindow):
         # Helper to add row
         def add_row(label, val, row):
             l = QLabel(label)
-            l.setFont(QFont("Segoe UI", 16))
+            l.setFont(ui_font(16))
             i = QLineEdit(val)
             form_layout.addWidget(l, row, 0)
             form_layout.addWidget(i, row, 1)
@@ -1123,7 +1859,7 @@ class MainApp(QMainWindow):
         
         # MAC Read only
         l_mac = QLabel("MAC Address:")
-        l_mac.setFont(QFont("Segoe UI", 16))
+        l_mac.setFont(ui_font(16))
         self.lbl_mac = QLabel("aa:bb:cc:dd:ee:ff")
         self.lbl_mac.setStyleSheet("color: #a6e3a1; font-weight: bold; font-size: 18px;")
         form_layout.addWidget(l_mac, 4, 0)
@@ -1147,18 +1883,16 @@ class MainApp(QMainWindow):
     # --- HELPERS ---
     def create_top_bar(self, title, back_callback):
         frame = QFrame()
-        frame.setStyleSheet("background-color: #1e1e2e; border-bottom: 2px solid #585b70;")
+        frame.setProperty("topbar", True) # QFrame[topbar] rules in STYLE_MAIN
         # Reduced height for 320px height screen
         frame.setFixedHeight(40)
         layout = QHBoxLayout(frame)
         layout.setContentsMargins(5, 5, 5, 5)
         
         btn = QPushButton("<")
-        btn.setStyleSheet("background-color: transparent; color: #cdd6f4; font-size: 14px; border: none; font-weight: bold;")
         btn.clicked.connect(back_callback)
         
         lbl = QLabel(title)
-        lbl.setStyleSheet("color: #cdd6f4; font-size: 16px; font-weight: bold;")
         lbl.setAlignment(Qt.AlignCenter)
         
         layout.addWidget(btn)
@@ -1172,66 +1906,77 @@ class MainApp(QMainWindow):
         btn = QToolButton()
         # Scaled down fonts
         btn.setText(f"{icon}\n{text}")
-        btn.setFont(QFont("Segoe UI", 10, QFont.Bold))
+        btn.setFont(ui_font(10, bold=True))
         btn.setToolButtonStyle(Qt.ToolButtonTextUnderIcon)
         btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         btn.setCursor(Qt.PointingHandCursor)
-        btn.setStyleSheet("""
-            QToolButton { background-color: #0078d7; color: white; border: none; padding: 5px; font-size: 12px; }
-            QToolButton:hover { background-color: #0063b1; }
-        """)
+        btn.setProperty("tile", "small") # QToolButton[tile] rules in STYLE_MAIN
         if callback:
             btn.clicked.connect(callback)
         layout.addWidget(btn, row, col)
 
+    def _invalidate_user_dirs(self, _path=None):
+        self._user_dirs_cache = None
+
+    def _list_user_dirs(self):
+        """Registered face folder names - one directory scan per change, not per refresh."""
+        if self._user_dirs_cache is None:
+            users = []
+            if os.path.isdir(KNOWN_FACES_DIR):
+                # DirEntry.is_dir uses the type from the directory listing - no stat per entry
+                with os.scandir(KNOWN_FACES_DIR) as it:
+                    users = [e.name for e in it if e.is_dir(follow_symlinks=False)]
+            self._user_dirs_cache = users
+        return self._user_dirs_cache
+
+    def _get_registered_ids(self):
+        """User ids with a face folder: 'user_id_name' folders give user_id, others the whole name."""
+        return {d.partition('_')[0] or d for d in self._list_user_dirs()}
+
     def refresh_user_view_and_show(self):
-        self.user_list_view.clear()
-        if os.path.exists(KNOWN_FACES_DIR):
-            users = [d for d in os.listdir(KNOWN_FACES_DIR) if os.path.isdir(os.path.join(KNOWN_FACES_DIR, d))]
-            for user in users:
-                self.user_list_view.addItem(QListWidgetItem(user))
+        self._ensure_screen(5)
+        self.user_list_model.setStringList(self._list_user_dirs()) # One model reset for all rows
         self.switch_screen(5)
 
     def refresh_delete_list_and_show(self):
-        self.delete_list.clear() # Fix for existing function needing update
-        if os.path.exists(KNOWN_FACES_DIR):
-            users = [d for d in os.listdir(KNOWN_FACES_DIR) if os.path.isdir(os.path.join(KNOWN_FACES_DIR, d))]
-            for user in users:
-                self.delete_list.addItem(QListWidgetItem(user))
+        self._ensure_screen(3)
+        self.delete_model.setStringList(self._list_user_dirs())
         self.switch_screen(3)
 
     def delete_selected_user(self):
-        item = self.delete_list.currentItem()
-        if not item:
+        index = self.delete_list.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "Selection", "Please select a user to delete.")
             return
         
-        user_dir = item.text()
+        user_dir = index.data()
         confirm = QMessageBox.question(self, "Confirm Delete", 
                                      f"Are you sure you want to delete '{user_dir}'?",
                                      QMessageBox.Yes | QMessageBox.No)
         
         if confirm == QMessageBox.Yes:
-            full_path = os.path.join(KNOWN_FACES_DIR, user_dir)
-            try:
-                shutil.rmtree(full_path)
-                QMessageBox.information(self, "Success", f"User '{user_dir}' deleted.")
-                self.refresh_delete_list_and_show()
-                # Trigger model reload
-                self.train_thread.start()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete: {e}")
+            # rmtree off the GUI thread; _on_user_deleted picks up when it's done
+            self.btn_confirm_del.setEnabled(False)
+            task = RmTreeTask(user_dir)
+            task.signals.done.connect(self._on_user_deleted)
+            self._rmtree_signals = task.signals # Keep alive until done is delivered
+            QThreadPool.globalInstance().start(task)
+
+    def _on_user_deleted(self, user_dir, success, error):
+        self.btn_confirm_del.setEnabled(True)
+        if not success:
+            QMessageBox.critical(self, "Error", f"Failed to delete: {error}")
+            return
+        self._invalidate_user_dirs() # Don't depend on the watcher's signal having arrived yet
+        QMessageBox.information(self, "Success", f"User '{user_dir}' deleted.")
+        self.refresh_delete_list_and_show()
+        # Trigger model reload
+        self.train_thread.add_job("remove", user_dir)
 
     def show_about_screen(self):
-        # Get IP
-        ip = "Unknown"
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-        except:
-            ip = "127.0.0.1"
+        self._ensure_screen(4)
+        # Last result of the periodic network check (same IP as the home screen)
+        ip = self._last_ip or "Unknown"
         
         self.lbl_ip.setText(f"IP Address: {ip}")
         self.switch_screen(4)
@@ -1251,24 +1996,54 @@ class MainApp(QMainWindow):
         self.lbl_status.setText("Look at the camera...")
         self.lbl_status.setStyleSheet("color: #cdd6f4;")
         
+        self._mode_timer.stop() # A still-pending IDLE must not cancel the capture
         self.thread.start_capture(uid, name)
 
+    def update_video_emit(self, *_):
+        # Home(0) and Register(2) show video - and only while the window is visible
+        visible = self.isVisible() and not self.isMinimized()
+        self.thread.set_emit(visible and self.central_widget.currentIndex() in (0, 2))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if hasattr(self, "thread"):
+            self.update_video_emit()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if hasattr(self, "thread"):
+            self.update_video_emit()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange and hasattr(self, "thread"):
+            self.update_video_emit() # Minimized / restored
+
     def update_video_feed(self, img):
-        current_idx = self.central_widget.currentIndex()
-        # Only show video in Home(0) and Register(2)
-        if current_idx == 0:
-            target = self.video_container
-        elif current_idx == 2:
-            target = self.video_label_reg
-        else:
-            return
-        
+        # img views VideoThread's frame buffer - hand it back however we exit
         try:
-            pixmap = QPixmap.fromImage(img)
-            target.setPixmap(pixmap)
-        except:
-            # Silently ignore any Qt errors during screen transitions
-            pass
+            current_idx = self.central_widget.currentIndex()
+            # Only show video in Home(0) and Register(2)
+            if current_idx == 0:
+                target = self.video_container
+            elif current_idx == 2:
+                target = self.video_label_reg
+            else:
+                return
+            self.thread.set_target_size(target.width(), target.height())
+            if time.monotonic() - self._last_clock_tick >= 1.0:
+                self.update_home_ui() # Clock rides on the frames - no separate 1 Hz wakeup
+            
+            try:
+                # Reuse one pixmap's storage instead of allocating a new one per frame.
+                # Deep copy - the frame buffer is free after this
+                self._video_pixmap.convertFromImage(img)
+                target.setPixmap(self._video_pixmap)
+            except:
+                # Silently ignore any Qt errors during screen transitions
+                pass
+        finally:
+            self.thread.release_frame()
 
     def handle_video_signal(self, msg):
         current_idx = self.central_widget.currentIndex()
@@ -1291,15 +2066,17 @@ class MainApp(QMainWindow):
                     user_id = parts[0]
                     name = parts[1]
 
-                now = time.time()
+                now = time.monotonic()
                 if now - self.last_recognized_time > 3.0: 
                     self.last_recognized_time = now
+                    self.thread.set_cooldown(3.0) # Nothing to match until the welcome is over
                     self.show_welcome(name)
                     self.log_attendance(user_id, name)
         elif current_idx == 2: # Register
              if msg == "CAPTURE_COMPLETE":
                 self.lbl_status.setText("Processing Profile...")
-                self.train_thread.start()
+                self.train_thread.add_job("add", self.thread.capture_dir,
+                                          preloaded=self.thread.take_captured_crops())
 
     def update_capture_progress(self, val):
         self.progress_ring.set_value(val)
@@ -1309,10 +2086,20 @@ class MainApp(QMainWindow):
         self.overlay.show_message(f"Welcome, {name}!")
 
     def log_attendance(self, user_id, name):
-        # time_str removed as it's handled in DB
-        # Call updated add_record with user_id
         # Confidence is not passed from Recognizer yet, default to 0.0 or update recognizer later
-        self.db.add_record(DEVICE_ID, name, user_id=user_id)
+        # Punch time is taken now; the row is written by flush_attendance()
+        self._pending_punches.append((DEVICE_ID, name, user_id, 0.0, datetime.now()))
+        if len(self._pending_punches) >= 16:
+            self.flush_attendance()
+
+    def flush_attendance(self):
+        if not self._pending_punches:
+            return
+        batch, self._pending_punches = self._pending_punches, []
+        try:
+            self.db.add_records_batch(batch)
+        except Exception as e:
+            print(f"Attendance write failed ({len(batch)} punches): {e}")
 
     def on_training_complete(self, success, msg):
         if self.central_widget.currentIndex() == 2: # Register Mode
@@ -1337,11 +2124,7 @@ class MainApp(QMainWindow):
         self.btn_cancel_reg.show()
         self.progress_ring.hide()
         self.lbl_status.setText("Ready")
-        self.thread.set_mode("IDLE")  # Ensure we stop scanning when resetting
-
-    def closeEvent(self, event):
-        self.thread.stop()
-        event.accept()
+        self.thread.set_mode(Mode.IDLE)  # Ensure we stop scanning when resetting
 
     def init_employee_list_screen(self):
         """Screen 12 — Employee list from dashboard with face-registration status."""
@@ -1361,29 +2144,33 @@ class MainApp(QMainWindow):
         layout.addWidget(hint)
 
         # List widget
-        self.emp_list_view = QListWidget()
-        self.emp_list_view.setFont(QFont("Segoe UI", 13))
+        # Model/view: rows are plain dicts, only the visible ones are ever rendered
+        self.emp_model = EmployeeModel(self)
+        self.emp_list_view = QListView()
+        self.emp_list_view.setModel(self.emp_model)
+        self.emp_list_view.setUniformItemSizes(True) # No per-row size queries for layout
+        self.emp_list_view.setFont(ui_font(13))
         self.emp_list_view.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #1e1e2e;
                 border: none;
                 padding: 4px;
             }
-            QListWidget::item {
+            QListView::item {
                 background-color: #313244;
                 border-radius: 6px;
                 margin: 3px 6px;
                 padding: 8px 10px;
                 border-left: 4px solid #45475a;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #45475a;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #3a3a4a;
             }
         """)
-        self.emp_list_view.itemClicked.connect(self.on_employee_item_clicked)
+        self.emp_list_view.clicked.connect(self.on_employee_item_clicked)
         layout.addWidget(self.emp_list_view)
 
         # Bottom refresh button
@@ -1406,59 +2193,42 @@ class MainApp(QMainWindow):
 
     def refresh_employee_list(self):
         """Reload employee list from SQLite and mark registration status."""
-        self.emp_list_view.clear()
-
+        if 12 not in self._built_screens:
+            return # Not opened yet - switch_screen(12) fills it on first open
         # Registered face folders: 'user_id_name' or just 'name'
-        registered_ids = set()
-        if os.path.exists(KNOWN_FACES_DIR):
-            for folder in os.listdir(KNOWN_FACES_DIR):
-                if os.path.isdir(os.path.join(KNOWN_FACES_DIR, folder)):
-                    # Try to extract user_id from folder name 'ID_Name'
-                    registered_ids.add(folder.split('_')[0] if '_' in folder else folder)
+        registered_ids = self._get_registered_ids()
 
         users = self.db.get_all_users()
 
         if not users:
-            item = QListWidgetItem("  No employees found. Sync from dashboard first.")
-            item.setForeground(QColor("#a6adc8"))
-            item.setFlags(item.flags() & ~Qt.ItemIsSelectable)
-            self.emp_list_view.addItem(item)
+            self.emp_model.set_rows([{"text": "  No employees found. Sync from dashboard first.",
+                                      "color": EMP_FG_INFO}])
             return
 
+        rows = []
+        reg_count = 0
         for u in users:
             uid  = u["user_id"]
             name = u["name"]
             is_registered = (uid in registered_ids)
+            reg_count += is_registered
 
-            if is_registered:
-                badge = "✅"
-                color = "#a6e3a1"   # green
-                left_border = "#a6e3a1"
-            else:
-                badge = "⚠️"
-                color = "#f9e2af"   # yellow
-                left_border = "#f9e2af"
-
-            label = f"  {badge}  {uid:<8}  {name}"
-            item  = QListWidgetItem(label)
-            item.setForeground(QColor(color))
-            # Store user data for click handler
-            item.setData(Qt.UserRole, {"user_id": uid, "name": name, "registered": is_registered})
-            # Colour the left border via stylesheet on item isn't directly possible —
-            # we differentiate only by foreground colour
-            self.emp_list_view.addItem(item)
+            template, color = EMP_ROW_STYLE[is_registered]
+            rows.append({
+                "text": template.format(uid, name),
+                "color": color,
+                # User data for click handler
+                "user": {"user_id": uid, "name": name, "registered": is_registered},
+            })
 
         # Status summary at bottom
         total = len(users)
-        reg_count = sum(1 for u in users if u["user_id"] in registered_ids)
-        summary = QListWidgetItem(f"  📊  {reg_count}/{total} registered")
-        summary.setForeground(QColor("#89b4fa"))
-        summary.setFlags(summary.flags() & ~Qt.ItemIsSelectable)
-        self.emp_list_view.addItem(summary)
+        rows.append({"text": f"  📊  {reg_count}/{total} registered", "color": EMP_FG_SUMMARY})
+        self.emp_model.set_rows(rows) # One model reset instead of a widget item per row
 
-    def on_employee_item_clicked(self, item):
+    def on_employee_item_clicked(self, index):
         """Pre-fill name/ID and jump to face capture screen for unregistered users."""
-        data = item.data(Qt.UserRole)
+        data = index.data(Qt.UserRole)
         if not data:
             return  # Summary row or info row
 
@@ -1486,8 +2256,12 @@ class MainApp(QMainWindow):
 
     def closeEvent(self, event):
         self.thread.stop()
+        self.flush_attendance()
         self.mqtt_worker.stop()
         self.mqtt_worker.wait()
+        self.net_timer.stop()
+        self.net_worker.wait() # At most one probe in flight
+        self.train_thread.stop() # Bounded: a running retrain stops after its current image and saves
         event.accept()
 
 
@@ -7,6 +7,21 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from shared.config import KNOWN_FACES_DIR, YUNET_PATH, DETECTION_THRESHOLD
 
+# libjpeg-turbo (NEON on the Pi) encodes the samples a few times faster; optional
+try:
+    from turbojpeg import TurboJPEG
+    _tj = TurboJPEG()
+except Exception: # Module or the libturbojpeg shared library missing
+    _tj = None
+
+# Quality 95 with either encoder - TurboJPEG only makes the samples faster to write
+def save_jpeg(filename, img, quality=95):
+    if _tj is None:
+        cv2.imwrite(filename, img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return
+    with open(filename, 'wb') as f:
+        f.write(_tj.encode(img.copy() if not img.flags['C_CONTIGUOUS'] else img, quality=quality))
+
 def capture_faces():
     print("--- Face Description ---")
     face_id = input("Enter User ID (numeric, e.g., 1): ")
@@ -82,7 +97,7 @@ def capture_faces():
                         count += 1
                         
                         # Save the captured image into the datasets folder
-                        cv2.imwrite(f"{dir_name}/User.{face_id}.{count}.jpg", img[y:y+h,x:x+w])
+                        save_jpeg(f"{dir_name}/User.{face_id}.{count}.jpg", img[y:y+h,x:x+w])
                         
                         cv2.imshow('image', img)
                 
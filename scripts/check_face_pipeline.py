@@ -90,7 +90,7 @@ if faces_dir_ok:
 
     for folder in folders:
         fpath = os.path.join(KNOWN_FACES_DIR, folder)
-        imgs  = [f for f in os.listdir(fpath) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+        imgs  = [f for f in os.listdir(fpath) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.ppm'))]
         check(f"  {folder}: {len(imgs)} image(s)", len(imgs) > 0,
               "EMPTY FOLDER!" if not imgs else "")
 
@@ -100,7 +100,7 @@ if detector and faces_dir_ok:
     test_img_path = None
     for root, dirs, files in os.walk(KNOWN_FACES_DIR):
         for f in files:
-            if f.lower().endswith(('.jpg', '.jpeg', '.png')):
+            if f.lower().endswith(('.jpg', '.jpeg', '.png', '.ppm')):
                 test_img_path = os.path.join(root, f)
                 break
         if test_img_path:
@@ -55,7 +55,7 @@ if os.path.exists(KNOWN_FACES_DIR):
     folder_info = {}
     for f in folders:
         imgs = [x for x in os.listdir(os.path.join(KNOWN_FACES_DIR, f))
-                if x.lower().endswith(('.jpg','.jpeg','.png'))]
+                if x.lower().endswith(('.jpg','.jpeg','.png','.ppm'))]
         folder_info[f] = len(imgs)
     report["face_folders"] = folder_info
 
@@ -64,7 +64,7 @@ if det and os.path.exists(KNOWN_FACES_DIR):
     test_img = None
     for root, dirs, files in os.walk(KNOWN_FACES_DIR):
         for f in files:
-            if f.lower().endswith(('.jpg','.jpeg','.png')):
+            if f.lower().endswith(('.jpg','.jpeg','.png','.ppm')):
                 test_img = os.path.join(root, f)
                 break
         if test_img: break
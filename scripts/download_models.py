@@ -35,15 +35,24 @@ def main():
     # Model URLs
     # 1. Face Detection: YuNet
     yunet_url = "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx"
+    # Optional INT8-quantized YuNet (used when MODEL_PRECISION = "int8")
+    yunet_int8_url = "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar_int8.onnx"
     
     # 2. Face Recognition: MobileFaceNet
     # Using a known repository that hosts the ONNX converted model
     mobilefacenet_url = "https://github.com/foamliu/MobileFaceNet/blob/master/weights/MobileFaceNet.onnx?raw=true"
+
+    # 3. Optional: LBP cascade for the HMI's empty-frame prefilter (pip wheels don't ship it)
+    lbp_cascade_url = "https://raw.githubusercontent.com/opencv/opencv/4.x/data/lbpcascades/lbpcascade_frontalface_improved.xml"
     
     print("--- Downloading Models ---")
     
     f1 = download_file(yunet_url)
     f2 = download_file(mobilefacenet_url)
+    if not download_file(yunet_int8_url):
+        print("INT8 YuNet not available; MODEL_PRECISION='int8' will fall back to FP32.")
+    if not download_file(lbp_cascade_url):
+        print("LBP cascade not available; the HMI will run without the empty-frame prefilter.")
     
     if f1 and f2:
         print("\nAll models downloaded successfully!")
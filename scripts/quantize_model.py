@@ -0,0 +1,75 @@
+"""
+scripts/quantize_model.py
+Build an INT8 MobileFaceNet (assets/MobileFaceNet_int8.onnx) for MODEL_PRECISION = "int8".
+Static quantization, calibrated on the registered faces in data/known_faces
+(aligned the same way FaceEncoder does), in the QOperator format OpenCV's DNN reads.
+Run on the PC - needs onnxruntime:  pip install onnxruntime
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+from shared.config import MOBILEFACENET_PATH, MOBILEFACENET_INT8_PATH, KNOWN_FACES_DIR
+from core.face_encoder import FaceEncoder
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import (
+        quantize_static, CalibrationDataReader, QuantFormat, QuantType
+    )
+except ImportError:
+    print("[ERROR] onnxruntime is required: pip install onnxruntime")
+    sys.exit(1)
+
+MAX_CALIBRATION_IMAGES = 200
+
+
+class FaceCalibrationReader(CalibrationDataReader):
+    """Feeds aligned, preprocessed faces (same blob params as FaceEncoder) to the calibrator."""
+    def __init__(self, input_name, image_paths, encoder):
+        self.input_name = input_name
+        self.encoder = encoder
+        self._paths = iter(image_paths)
+
+    def get_next(self):
+        for path in self._paths:
+            face_img = self.encoder._extract_face(cv2.imread(path), path)
+            if face_img is None:
+                continue
+            blob = cv2.dnn.blobFromImage(face_img, 1.0/128.0, (112, 112), (127.5, 127.5, 127.5), swapRB=True)
+            return {self.input_name: blob}
+        return None
+
+
+def main():
+    if not os.path.exists(MOBILEFACENET_PATH):
+        print(f"[ERROR] {MOBILEFACENET_PATH} not found. Run scripts/download_models.py first.")
+        sys.exit(1)
+
+    image_paths = []
+    for root, dirs, files in os.walk(KNOWN_FACES_DIR):
+        for f in files:
+            if f.lower().endswith(('.jpg', '.jpeg', '.png', '.ppm')):
+                image_paths.append(os.path.join(root, f))
+    if not image_paths:
+        print("[ERROR] No registered faces to calibrate with. Register some users first.")
+        sys.exit(1)
+    image_paths = image_paths[:MAX_CALIBRATION_IMAGES]
+
+    input_name = ort.InferenceSession(MOBILEFACENET_PATH, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    reader = FaceCalibrationReader(input_name, image_paths, FaceEncoder())
+
+    print(f"Calibrating on {len(image_paths)} images...")
+    quantize_static(
+        MOBILEFACENET_PATH, MOBILEFACENET_INT8_PATH, reader,
+        quant_format=QuantFormat.QOperator,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    print(f"Saved: {MOBILEFACENET_INT8_PATH}")
+    print('Set MODEL_PRECISION = "int8" in shared/config.py to use it.')
+
+
+if __name__ == "__main__":
+    main()
@@ -20,11 +20,37 @@ SERVER_DB_PATH = os.path.join(DATA_DIR, "server_attendance.db")
 KNOWN_FACES_DIR = os.path.join(DATA_DIR, "known_faces")
 EMBEDDINGS_FILE = os.path.join(DATA_DIR, "embeddings.npy")
 NAMES_FILE      = os.path.join(DATA_DIR, "names.json")
+# Which embedder precision built embeddings.npy - a mismatch forces a full re-encode
+EMBEDDINGS_META_FILE = os.path.join(DATA_DIR, "embeddings_meta.json")
 
 # ─── Models ───────────────────────────────────────────────────────────────────
 YUNET_PATH        = os.path.join(ASSETS_DIR, "face_detection_yunet_2023mar.onnx")
 MOBILEFACENET_PATH = os.path.join(ASSETS_DIR, "MobileFaceNet.onnx")
 
+# Inference precision for the live recognizer: "fp32", "fp16" or "int8"
+#   fp16 → FP16 CPU target where the OpenCV build supports it
+#   int8 → quantized model files below (falls back to FP32 files if missing)
+MODEL_PRECISION         = "fp32"
+YUNET_INT8_PATH         = os.path.join(ASSETS_DIR, "face_detection_yunet_2023mar_int8.onnx")
+MOBILEFACENET_INT8_PATH = os.path.join(ASSETS_DIR, "MobileFaceNet_int8.onnx")
+
+def model_paths():
+    """
+    (YuNet, MobileFaceNet) files for MODEL_PRECISION. The live recognizer and the
+    encoder both load these, so stored and live embeddings come from the same model.
+    """
+    yunet, mobilefacenet = YUNET_PATH, MOBILEFACENET_PATH
+    if MODEL_PRECISION == "int8":
+        # Quantized variants when present, FP32 files otherwise
+        if os.path.exists(YUNET_INT8_PATH):
+            yunet = YUNET_INT8_PATH
+        if os.path.exists(MOBILEFACENET_INT8_PATH):
+            mobilefacenet = MOBILEFACENET_INT8_PATH
+    return yunet, mobilefacenet
+
+# LBP cascade the HMI uses to skip YuNet on empty frames (no prefilter if missing)
+LBP_CASCADE_PATH = os.path.join(ASSETS_DIR, "lbpcascade_frontalface_improved.xml")
+
 # ─── LAN Sync (PC / Laptop on same network) ───────────────────────────────────
 # Set this to the IP address of the laptop/PC running server/api.py
 LAN_SERVER_IP   = "192.168.1.100"   # <-- CHANGE to your PC's local IP
@@ -42,6 +68,8 @@ MQTT_TOPIC_RECEIVE_USERS   = "p/a/1/receive-users"  # Subscribe — receive empl
 
 # ─── Camera & Recognition ─────────────────────────────────────────────────────
 CAMERA_INDEX          = 0
+# Remembers the camera backend/resolution that worked, to skip failing probes on boot
+CAMERA_CACHE_FILE     = os.path.join(os.path.expanduser("~"), ".bio_v3_cache")
 DETECTION_THRESHOLD   = 0.6
 RECOGNITION_THRESHOLD = 0.70
 VERIFICATION_FRAMES   = 5